@@ -0,0 +1,202 @@
+# accounting.py
+import threading
+
+import numpy as np
+
+from telemetry import FIELD_NAMES
+
+
+class PacketAccounting:
+    """
+    Loss, duplicate and reorder accounting over the Packet Count field.
+
+    Recent packet IDs live in a fixed bitmap window, so every packet costs
+    O(1) whatever the gap. IDs are unwrapped against the counter modulus
+    (the binary frame carries a uint32), and a late packet still inside the
+    window fills its gap instead of being counted as lost. A packet from
+    further back is only counted as late: it cannot be told from a
+    duplicate, so its gap stays counted as lost. A jump of reset_jump IDs
+    or more either way (default 16 windows, at most a quarter of the
+    modulus), or reset_after backward packets in a row, is taken as a
+    counter reset rather than loss, so one corrupted ID cannot add a huge
+    gap.
+
+    Fed on the reader thread by SerialManager.publish(); stats() may be
+    called from any thread.
+    """
+
+    def __init__(self, window=4096, modulus=2 ** 32, loss_window_s=10.0,
+                 bucket_s=0.5, jitter_samples=4096, reset_jump=None, reset_after=16):
+        self.window = window
+        self.reset_jump = reset_jump or min(16 * window, modulus // 4)
+        self.reset_after = reset_after
+        self.modulus = modulus
+        self.loss_window_s = loss_window_s
+        self.bucket_s = bucket_s
+        self.jitter_samples = jitter_samples
+
+        self._lock = threading.Lock()
+        self._seen = bytearray(window)
+        # Per-bucket expected/received counts for the sliding loss window
+        self._buckets = int(np.ceil(loss_window_s / bucket_s))
+        self._expected = np.zeros(self._buckets, dtype=np.int64)
+        self._received = np.zeros(self._buckets, dtype=np.int64)
+        # Ring of inter-arrival intervals and their jitter (|d interval|)
+        self._intervals = np.zeros(jitter_samples, dtype=np.float64)
+        self._jitter = np.zeros(jitter_samples, dtype=np.float64)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._seen[:] = bytes(self.window)
+            self._expected[:] = 0
+            self._received[:] = 0
+            self._bucket = None
+            self._highest = None    # newest ID, unwrapped (keeps counting past the modulus)
+            self._lowest = None     # first ID since the last (re)anchor
+            self._backward = 0      # consecutive packets behind the newest ID
+            self._last_rx = None
+            self._last_interval = None
+            self._samples = 0
+            self._jitter_count = 0
+
+            self.received = 0
+            self.lost = 0
+            self.duplicates = 0
+            self.reordered = 0
+            self.late = 0
+            self.resets = 0
+            self.corrupt = 0
+            self.truncated = 0
+            self.last_id = None
+            self.last_rx_time = None
+
+    def add_packets(self, packets):
+        with self._lock:
+            for packet in packets:
+                self._add(packet)
+
+    def _add(self, packet):
+        packet_id = packet["Packet Count"]
+        if packet_id is None:
+            self.corrupt += 1
+            return
+        if packet.field_count < len(FIELD_NAMES):
+            self.truncated += 1
+
+        rx_time = packet.rx_time
+        self._advance_buckets(rx_time)
+        slot = self._bucket % self._buckets
+
+        if self._highest is None:
+            self._anchor(packet_id)
+            self._expected[slot] += 1
+        else:
+            # Signed distance from the newest ID, modulo counter wrap
+            half = self.modulus // 2
+            delta = (packet_id - self._highest + half) % self.modulus - half
+            if delta <= 0:
+                self._backward += 1
+            if 0 < delta < self.reset_jump:
+                self._backward = 0
+                self._advance_window(delta)
+                self.lost += delta - 1
+                self._expected[slot] += delta
+            elif abs(delta) >= self.reset_jump or self._backward >= self.reset_after:
+                self.resets += 1
+                self._backward = 0
+                self._anchor(packet_id)
+                self._expected[slot] += 1
+            elif -delta >= self.window or self._highest + delta < self._lowest:
+                self.late += 1
+            else:
+                index = (self._highest + delta) % self.window
+                if self._seen[index]:
+                    self.duplicates += 1
+                    return
+                self._seen[index] = 1
+                self.reordered += 1
+                self.lost -= 1
+
+        self.received += 1
+        self._received[slot] += 1
+        self.last_id = packet_id
+        self._arrival(rx_time)
+
+    def _anchor(self, packet_id):
+        self._seen[:] = bytes(self.window)
+        self._highest = self._lowest = packet_id
+        self._seen[packet_id % self.window] = 1
+
+    def _advance_window(self, delta):
+        """Move the newest ID forward by delta, clearing the slots it passes."""
+        if delta >= self.window:
+            self._seen[:] = bytes(self.window)
+        else:
+            start = (self._highest + 1) % self.window
+            end = start + delta
+            if end <= self.window:
+                self._seen[start:end] = bytes(delta)
+            else:
+                self._seen[start:] = bytes(self.window - start)
+                self._seen[:end - self.window] = bytes(end - self.window)
+        self._highest += delta
+        self._seen[self._highest % self.window] = 1
+
+    def _advance_buckets(self, rx_time):
+        bucket = int(rx_time // self.bucket_s)
+        if self._bucket is None:
+            self._bucket = bucket
+            return
+        steps = min(bucket - self._bucket, self._buckets)
+        for i in range(1, steps + 1):
+            slot = (self._bucket + i) % self._buckets
+            self._expected[slot] = 0
+            self._received[slot] = 0
+        self._bucket = max(bucket, self._bucket)
+
+    def _arrival(self, rx_time):
+        if self._last_rx is not None:
+            interval = rx_time - self._last_rx
+            self._intervals[self._samples % self.jitter_samples] = interval
+            if self._last_interval is not None:
+                self._jitter[self._jitter_count % self.jitter_samples] = abs(interval - self._last_interval)
+                self._jitter_count += 1
+            self._last_interval = interval
+            self._samples += 1
+        self._last_rx = rx_time
+        self.last_rx_time = rx_time
+
+    def stats(self):
+        """Snapshot of the counters; intervals and jitter are in milliseconds."""
+        with self._lock:
+            expected = self.received + self.lost
+            window_expected = int(self._expected.sum())
+            window_lost = max(window_expected - int(self._received.sum()), 0)
+            n = min(self._samples, self.jitter_samples)
+            intervals = self._intervals[:n].copy()
+            m = min(self._jitter_count, self.jitter_samples)
+            jitter = self._jitter[:m].copy()
+            stats = {
+                "received": self.received,
+                "lost": self.lost,
+                "duplicates": self.duplicates,
+                "reordered": self.reordered,
+                "late": self.late,
+                "resets": self.resets,
+                "corrupt": self.corrupt,
+                "truncated": self.truncated,
+                "last_id": self.last_id,
+                "last_rx_time": self.last_rx_time,
+                "loss_pct": 100.0 * self.lost / expected if expected else 0.0,
+                "window_loss_pct": 100.0 * window_lost / window_expected if window_expected else 0.0,
+                "window_s": self.loss_window_s,
+            }
+
+        if n:
+            p50, p95, p99 = (np.percentile(intervals, (50, 95, 99)) * 1000.0).tolist()
+            stats.update(interval_p50=p50, interval_p95=p95, interval_p99=p99)
+        if len(jitter):
+            p50, p95, p99 = (np.percentile(jitter, (50, 95, 99)) * 1000.0).tolist()
+            stats.update(jitter_p50=p50, jitter_p95=p95, jitter_p99=p99)
+        return stats
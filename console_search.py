@@ -0,0 +1,179 @@
+# console_search.py
+"""
+Search over the full console history, off the GUI thread.
+
+A query is either a field predicate such as
+    Packet Count > 1200 and Flight State == DESCENT
+evaluated column-wise against the TelemetryStore, or a regular expression
+run over the console's on-disk history. Both use indexes that are built
+incrementally as lines arrive: the history's line-offset array, and the
+console's store-row -> console-line map. Matches are streamed back in
+batches through the matches signal.
+"""
+import re
+import threading
+import time
+
+import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from store import INT_MISSING
+from derived import DERIVED_NAMES
+from telemetry import FIELD_NAMES
+
+
+_CLAUSE = re.compile(r"^\s*(.+?)\s*(==|!=|>=|<=|=|>|<)\s*(.+?)\s*$")
+_FIELDS = {name.lower(): name for name in FIELD_NAMES + DERIVED_NAMES}
+_OPS = {
+    "==": np.equal, "!=": np.not_equal,
+    ">": np.greater, ">=": np.greater_equal,
+    "<": np.less, "<=": np.less_equal,
+}
+
+
+def parse_predicate(query):
+    """
+    Parse "Field op value [and|or ...]" into OR-groups of AND-clauses
+    [[(field, op, value), ...], ...]. Returns None if the query is not a
+    predicate over known fields.
+    """
+    groups = []
+    for group in re.split(r"\s+or\s+", query.strip(), flags=re.IGNORECASE):
+        clauses = []
+        for text in re.split(r"\s+and\s+", group, flags=re.IGNORECASE):
+            match = _CLAUSE.match(text)
+            if not match or match.group(1).lower() not in _FIELDS:
+                return None
+            op = "==" if match.group(2) == "=" else match.group(2)
+            clauses.append((_FIELDS[match.group(1).lower()], op, match.group(3).strip("'\"")))
+        groups.append(clauses)
+    return groups
+
+
+def evaluate_predicate(groups, columns):
+    """Boolean mask over a batch of store columns. Text values compare case-insensitively, like field names."""
+    result = None
+    for clauses in groups:
+        mask = None
+        for field, op, text in clauses:
+            values = columns[field]
+            if values.dtype.kind == "S":
+                hit = _OPS[op](np.char.upper(values), text.upper().encode())
+            else:
+                try:
+                    number = float(text)
+                except ValueError:
+                    raise ValueError(f"{field} needs a number, got {text!r}")
+                hit = _OPS[op](values, number)
+                if values.dtype.kind == "i":
+                    hit &= values != INT_MISSING
+            mask = hit if mask is None else mask & hit
+        result = mask if result is None else result | mask
+    return result
+
+
+class SearchJob(QObject):
+    matches = pyqtSignal(list)          # [(line number, text), ...]
+    finished = pyqtSignal(int, float)   # total matches, seconds
+    failed = pyqtSignal(str)
+
+    block_lines = 50000
+
+    def __init__(self, query, history, store=None, packet_rows=None, packet_lines=None,
+                 max_results=10000, parent=None):
+        super().__init__(parent)
+        self.query = query
+        self.store = store
+        self.max_results = max_results
+        self.predicate = parse_predicate(query) if store is not None else None
+
+        # Snapshot everything the worker touches, so the GUI can keep appending
+        path, offsets, self.line_count = history.snapshot()
+        self.path = path
+        self.offsets = np.frombuffer(offsets, dtype=np.uint64) if len(offsets) else np.zeros(0, np.uint64)
+        self.packet_rows = np.frombuffer(packet_rows, dtype=np.int64).copy() if packet_rows else np.zeros(0, np.int64)
+        self.packet_lines = np.frombuffer(packet_lines, dtype=np.int64).copy() if packet_lines else np.zeros(0, np.int64)
+
+        self._cancel = threading.Event()
+        self._thread = None
+        self.total = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        started = time.monotonic()
+        try:
+            if self.path is None:
+                raise ValueError("This console keeps no on-disk history to search")
+            with open(self.path, "rb") as f:
+                if self.predicate is not None:
+                    self._search_store(f)
+                else:
+                    self._search_text(f)
+        except (re.error, ValueError) as e:
+            self.failed.emit(str(e))
+            return
+        self.finished.emit(self.total, time.monotonic() - started)
+
+    def _emit(self, found):
+        if found:
+            self.matches.emit(found)
+
+    def _room(self):
+        return max(0, self.max_results - self.total)
+
+    def _search_text(self, f):
+        pattern = re.compile(self.query.encode("utf-8"), re.IGNORECASE | re.MULTILINE)
+        offsets = self.offsets[:self.line_count]
+        for first in range(0, self.line_count, self.block_lines):
+            if self._cancel.is_set():
+                return
+            last = min(first + self.block_lines, self.line_count)
+            start = int(offsets[first])
+            f.seek(start)
+            data = f.read(int(offsets[last]) - start) if last < len(self.offsets) else f.read()
+            if last == self.line_count:
+                data = data[:data.find(b"\n", int(offsets[last - 1]) - start) + 1 or None]
+
+            positions = [m.start() for m in pattern.finditer(data)]
+            if not positions:
+                continue
+            local = offsets[first:last] - np.uint64(start)
+            hits = np.unique(np.searchsorted(local, np.array(positions, np.uint64), "right") - 1)
+            found = []
+            for i in hits[:self._room()]:
+                begin = int(local[i])
+                end = data.find(b"\n", begin)
+                found.append((first + int(i), data[begin:end if end >= 0 else None].decode("utf-8", "replace")))
+            self.total += len(hits)
+            self._emit(found)
+
+    def _search_store(self, f):
+        fields = sorted({field for clauses in self.predicate for field, _, _ in clauses})
+        row = 0
+        for columns in self.store.iter_chunks(fields=fields):
+            if self._cancel.is_set():
+                return
+            n = len(columns[fields[0]])
+            rows = np.flatnonzero(evaluate_predicate(self.predicate, columns)) + row
+            row += n
+            if not len(rows):
+                continue
+
+            # Only rows the console actually shows have a line to jump to
+            slots = np.searchsorted(self.packet_rows, rows)
+            slots = slots[slots < len(self.packet_rows)]
+            slots = slots[np.isin(self.packet_rows[slots], rows)]
+            lines = self.packet_lines[slots]
+            lines = lines[lines < self.line_count]
+            found = []
+            for line in lines[:self._room()]:
+                f.seek(int(self.offsets[line]))
+                found.append((int(line), f.readline().rstrip(b"\n").decode("utf-8", "replace")))
+            self.total += len(lines)
+            self._emit(found)
@@ -1,11 +1,18 @@
 # cs.py
 from PyQt5.QtWidgets import (
-    QWidget, QTextEdit, QLineEdit, QPushButton, QListWidget, QVBoxLayout,
+    QWidget, QLineEdit, QPushButton, QListWidget, QVBoxLayout,
     QHBoxLayout, QLabel, QCheckBox, QGroupBox, QGridLayout
 )
-from PyQt5.QtGui import QTextCursor
 from PyQt5.QtCore import Qt
 from datetime import datetime
+from array import array
+import time
+
+from console_search import SearchJob
+from ingest import KEEP_ALL
+from log_view import LineHistory, LogView
+from render import get_render_scheduler
+from telemetry import format_value
 
 
 class ConsoleWindow(QWidget):
@@ -13,15 +20,8 @@ class ConsoleWindow(QWidget):
         super().__init__(parent)
         self.serial_manager = serial_manager
 
-        # Packet tracking
-        self.total_packets = 0
-        self.missing_packets = 0
-        self.corrupt_packets = 0
-        self.last_packet_id = -1
-        self.last_packet_time = "N/A"
-
         # Connect signal
-        self.serial_manager.data_received.connect(self.update_data)
+        self.serial_manager.subscribe(self.update_data, policy=KEEP_ALL, name="console")
 
         # Required telemetry headers only
         self.headers = [
@@ -32,16 +32,27 @@ class ConsoleWindow(QWidget):
         self.packet_labels = {}
         self.value_labels = {}
 
+        # Store row -> console line for every packet shown, for predicate search
+        self.packet_rows = array("q")
+        self.packet_lines = array("q")
+        self.search_job = None
+        self.search_result_lines = []
+        # Newest packet since the last label refresh
+        self.latest_packet = None
+
         self.setup_ui()
         self.setStyleSheet("""
             QGroupBox { border: 2px solid #555; border-radius: 8px; margin-top: 10px; padding: 10px; background-color: #f4f4f4; }
             QGroupBox::title { subcontrol-origin: margin; left: 10px; padding: 0 3px; color: #333; font-weight: bold; }
-            QTextEdit, QLineEdit, QListWidget, QLabel { background-color: white; border: 1px solid #aaa; border-radius: 5px; }
+            LogView, QLineEdit, QListWidget, QLabel { background-color: white; border: 1px solid #aaa; border-radius: 5px; }
             QPushButton { background-color: #d0d0d0; border-radius: 5px; padding: 6px; }
             QPushButton:hover { background-color: #bbb; }
             QCheckBox { padding-left: 5px; }
         """)
 
+        # Labels and packet stats are refreshed by the frame scheduler, only while visible
+        self.render_target = get_render_scheduler().register(self, self.refresh, max_fps=10)
+
     def setup_ui(self):
         main_layout = QHBoxLayout(self)
 
@@ -61,10 +72,22 @@ class ConsoleWindow(QWidget):
         command_layout.addWidget(self.clear_button)
         command_layout.addWidget(self.timestamp_checkbox)
 
-        self.console_output = QTextEdit()
-        self.console_output.setReadOnly(True)
-        self.raw_telemetry_display = QTextEdit()
-        self.raw_telemetry_display.setReadOnly(True)
+        search_layout = QHBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search: regex, or e.g. Packet Count > 1200 and Flight State == DESCENT")
+        self.search_button = QPushButton("Find")
+        self.search_status = QLabel("")
+        search_layout.addWidget(self.search_input)
+        search_layout.addWidget(self.search_button)
+        search_layout.addWidget(self.search_status)
+
+        self.search_results = QListWidget()
+        self.search_results.setUniformItemSizes(True)
+        self.search_results.hide()
+
+        # Full session history, paged from disk; the raw panel only keeps a short ring
+        self.console_output = LogView(LineHistory(max_lines=10000))
+        self.raw_telemetry_display = LogView(LineHistory(max_lines=1000, spill_to_disk=False))
 
         split_layout = QHBoxLayout()
         split_layout.addWidget(self.console_output, 7)
@@ -79,7 +102,11 @@ class ConsoleWindow(QWidget):
 
         packet_info_group = QGroupBox("Packet Info")
         packet_info_layout = QGridLayout(packet_info_group)
-        packet_headers = ["Total Packets", "Missing Packets", "Packet Loss %", "Corrupt Packets", "Last Packet ID", "Last Packet Time"]
+        packet_headers = [
+            "Total Packets", "Missing Packets", "Packet Loss %", "Recent Loss %", "Duplicate Packets",
+            "Reordered Packets", "Corrupt Packets", "Jitter p50/p95/p99 (ms)", "Last Packet ID", "Last Packet Time",
+            "Queue Depth", "Dropped Packets", "Coalesced Packets"
+        ]
         for row, name in enumerate(packet_headers):
             packet_info_layout.addWidget(QLabel(f"{name}:"), row, 0)
             label = QLabel("-")
@@ -91,7 +118,9 @@ class ConsoleWindow(QWidget):
         split_layout.addLayout(right_side_layout, 3)
 
         console_layout.addLayout(command_layout)
-        console_layout.addLayout(split_layout)
+        console_layout.addLayout(search_layout)
+        console_layout.addLayout(split_layout, 3)
+        console_layout.addWidget(self.search_results, 1)
         main_layout.addWidget(console_group, 3)
 
         # Telemetry panel
@@ -111,6 +140,9 @@ class ConsoleWindow(QWidget):
         self.clear_button.clicked.connect(self.clear_console)
         self.command_input.returnPressed.connect(self.send_command)
         self.command_history_list.itemClicked.connect(lambda item: self.command_input.setText(item.text()))
+        self.search_button.clicked.connect(self.start_search)
+        self.search_input.returnPressed.connect(self.start_search)
+        self.search_results.currentRowChanged.connect(self.show_search_result)
 
     def send_command(self):
         command = self.command_input.text().strip()
@@ -120,85 +152,110 @@ class ConsoleWindow(QWidget):
             self.command_history_list.addItem(command)
             self.command_input.clear()
 
+    def start_search(self):
+        query = self.search_input.text().strip()
+        if self.search_job:
+            self.search_job.cancel()
+            self.search_job = None
+        self.search_results.clear()
+        self.search_result_lines = []
+        if not query:
+            self.search_results.hide()
+            self.search_status.setText("")
+            return
+
+        self.search_job = SearchJob(
+            query, self.console_output.history, self.serial_manager.store,
+            self.packet_rows, self.packet_lines, parent=self
+        )
+        self.search_job.matches.connect(self.add_search_results)
+        self.search_job.finished.connect(self.on_search_finished)
+        self.search_job.failed.connect(self.search_status.setText)
+        self.search_results.show()
+        self.search_status.setText("Searching...")
+        self.search_job.start()
+
+    def add_search_results(self, matches):
+        if self.sender() is not self.search_job:
+            return  # results of a superseded search
+        self.search_result_lines.extend(line for line, _ in matches)
+        self.search_results.addItems([f"{line + 1}: {text}" for line, text in matches])
+
+    def on_search_finished(self, total, seconds):
+        if self.sender() is not self.search_job:
+            return
+        shown = len(self.search_result_lines)
+        more = f" (showing {shown})" if shown < total else ""
+        self.search_status.setText(f"{total} matches in {seconds * 1000:.0f} ms{more}")
+
+    def show_search_result(self, row):
+        if 0 <= row < len(self.search_result_lines):
+            self.console_output.scroll_to_line(self.search_result_lines[row])
+
     def clear_console(self):
         self.console_output.clear()
+        self.packet_rows = array("q")
+        self.packet_lines = array("q")
         self.raw_telemetry_display.clear()
         self.command_history_list.clear()
-        self.total_packets = 0
-        self.missing_packets = 0
-        self.corrupt_packets = 0
-        self.last_packet_id = -1
-        self.last_packet_time = "N/A"
+        self.serial_manager.accounting.reset()
         for label in self.packet_labels.values():
             label.setText("-")
         for label in self.value_labels.values():
             label.setText("-")
 
-    def update_data(self, data: str):
+    def update_data(self, packets):
         try:
-            self.console_output.append(data)
-            self.console_output.moveCursor(QTextCursor.End)
-            self.raw_telemetry_display.append(data)
+            lines = [packet.raw for packet in packets]
+            first_line = len(self.console_output.history)
+            for i, packet in enumerate(packets):
+                if packet.seq is not None:
+                    self.packet_rows.append(packet.seq)
+                    self.packet_lines.append(first_line + i)
+            self.console_output.append_lines(lines)
+            self.raw_telemetry_display.append_lines(lines)
 
-            self.parse_telemetry(data)
-            self.update_packet_info(data)
+            self.latest_packet = packets[-1]
+            self.render_target.mark_dirty()
         except Exception as e:
             print(f"[ConsoleWindow] update_data error: {e}")
 
-    def parse_telemetry(self, line: str):
-        parts = line.strip().split(',')
-        if len(parts) < len(self.headers):
+    def refresh(self):
+        """Labels are redrawn by the frame scheduler, only while the console is visible."""
+        packet, self.latest_packet = self.latest_packet, None
+        if packet is not None:
+            self.parse_telemetry(packet)
+        self.update_packet_info()
+
+    def parse_telemetry(self, packet):
+        if packet.field_count < len(self.headers):
             return
-        for header, value in zip(self.headers, parts):
+        for header in self.headers:
             if header in self.value_labels:
-                self.value_labels[header].setText(value)
+                self.value_labels[header].setText(format_value(header, packet[header]))
 
-    def extract_packet_id(self, parts):
-        try:
-            return int(parts[2])
-        except Exception:
-            return self.last_packet_id + 1
-
-    def update_packet_info(self, line: str):
-        parts = line.strip().split(',')
-        if len(parts) < 3:
-            self.corrupt_packets += 1
-        else:
-            try:
-                packet_id = self.extract_packet_id(parts)
-                if self.last_packet_id != -1 and packet_id > self.last_packet_id + 1:
-                    self.missing_packets += packet_id - (self.last_packet_id + 1)
-                self.last_packet_id = packet_id
-                self.total_packets += 1
-                self.last_packet_time = datetime.now().strftime("%H:%M:%S")
-            except Exception:
-                self.corrupt_packets += 1
-
-        total_expected = self.total_packets + self.missing_packets
-        packet_loss = (self.missing_packets / total_expected) * 100 if total_expected else 0
-
-        self.packet_labels["Total Packets"].setText(str(self.total_packets))
-        self.packet_labels["Missing Packets"].setText(str(self.missing_packets))
-        self.packet_labels["Packet Loss %"].setText(f"{packet_loss:.2f}")
-        self.packet_labels["Corrupt Packets"].setText(str(self.corrupt_packets))
-        self.packet_labels["Last Packet ID"].setText(str(self.last_packet_id))
-        self.packet_labels["Last Packet Time"].setText(self.last_packet_time)
-
-    @staticmethod
-    def convert_data(data: str, expected_type: str):
-        try:
-            if expected_type == "string":
-                return str(data)
-            elif expected_type == "int":
-                return int(data)
-            elif expected_type == "float":
-                return float(data)
-            elif expected_type == "char":
-                return data[0] if data else ''
-            elif expected_type == "uint8_t":
-                val = int(data)
-                return val if 0 <= val <= 255 else None
-            else:
-                return str(data)
-        except Exception:
-            return None
+    def update_packet_info(self):
+        stats = self.serial_manager.packet_stats()
+
+        self.packet_labels["Total Packets"].setText(str(stats["received"]))
+        self.packet_labels["Missing Packets"].setText(str(stats["lost"]))
+        self.packet_labels["Packet Loss %"].setText(f"{stats['loss_pct']:.2f}")
+        self.packet_labels["Recent Loss %"].setText(f"{stats['window_loss_pct']:.2f} ({stats['window_s']:.0f} s)")
+        self.packet_labels["Duplicate Packets"].setText(str(stats["duplicates"]))
+        late = f" (+{stats['late']} late)" if stats["late"] else ""
+        self.packet_labels["Reordered Packets"].setText(f"{stats['reordered']}{late}")
+        self.packet_labels["Corrupt Packets"].setText(str(stats["corrupt"]))
+        if "jitter_p50" in stats:
+            self.packet_labels["Jitter p50/p95/p99 (ms)"].setText(
+                f"{stats['jitter_p50']:.1f} / {stats['jitter_p95']:.1f} / {stats['jitter_p99']:.1f}"
+            )
+        if stats["last_id"] is not None:
+            self.packet_labels["Last Packet ID"].setText(str(stats["last_id"]))
+            # rx_time is monotonic; shift it onto the wall clock for display
+            received_at = time.time() - (time.monotonic() - stats["last_rx_time"])
+            self.packet_labels["Last Packet Time"].setText(datetime.fromtimestamp(received_at).strftime("%H:%M:%S"))
+
+        ingest = self.serial_manager.ingest_stats().values()
+        self.packet_labels["Queue Depth"].setText(str(sum(q["depth"] for q in ingest)))
+        self.packet_labels["Dropped Packets"].setText(str(sum(q["dropped"] for q in ingest)))
+        self.packet_labels["Coalesced Packets"].setText(str(sum(q["coalesced"] for q in ingest)))
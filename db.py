@@ -1,13 +1,16 @@
 # db.py
 import os
-import pandas as pd
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel,
-    QPushButton, QGridLayout, QMessageBox, QSizePolicy, QScrollArea
+    QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QPushButton, QMessageBox, QProgressBar
 )
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont
 from serial_port import SerialManager
+from export import ExportJob
+from ingest import KEEP_LATEST
+from render import get_render_scheduler
+from derived import DERIVED_NAMES, DERIVED_UNITS
+from telemetry import FIELD_NAMES, UNITS
+from telemetry_grid import TelemetryGridModel, TelemetryGridView
 
 
 class DbWindow(QWidget):
@@ -49,178 +52,121 @@ class DbWindow(QWidget):
             }
         """)
 
-        # Telemetry fields
-        self.telemetry_fields = [
-            "Team ID", "Timestamp", "Packet Count", "Altitude", "Pressure", "Temperature", "Voltage",
-            "GNSS Time", "GNSS Latitude", "GNSS Longitude", "GNSS Altitude", " GNSS Satellites",
-            "Accel X", "Accel Y", "Accel Z", "Gyro X", "Gyro Y", "Gyro Z", "Flight State"
-        ]
-
-        # SI Units for fields
-        self.units = {
-            "Team ID": "",
-            "Timestamp": "s",
-            "Packet Count": "",
-            "Altitude": "m",
-            "Pressure": "Pa",
-            "Temperature": "°C",
-            "Voltage": "V",
-            "GNSS Time": "s",
-            "GNSS Latitude": "°",
-            "GNSS Longitude": "°",
-            "GNSS Altitude": "m",
-            " GNSS Satellites": "",
-            "Accel X": "m/s²",
-            "Accel Y": "m/s²",
-            "Accel Z": "m/s²",
-            "Gyro X": "°/s",
-            "Gyro Y": "°/s",
-            "Gyro Z": "°/s",
-            "Flight State": ""
-        }
+        # Telemetry fields and SI units come from the shared schema, derived channels after them
+        self.telemetry_fields = list(FIELD_NAMES) + list(DERIVED_NAMES)
+        self.units = {**UNITS, **DERIVED_UNITS}
 
         # Connect to serial manager
-        self.serial_manager.data_received.connect(self.update_data)
+        # Display only: the session history lives in the shared store
+        self.serial_manager.subscribe(self.update_data, policy=KEEP_LATEST, name="dashboard")
 
-        self.data_store = []
-        self.labels = {}
-        self.values = {}
+        self.store = self.serial_manager.store
+        self.export_job = None
+        # Newest packet since the last repaint
+        self.latest_packet = None
 
         self.initUI()
 
+        # Repainted by the shared frame scheduler, only while visible
+        self.render_target = get_render_scheduler().register(self, self.refresh)
+        self.set_refresh_rate(20)
+
     def initUI(self):
         main_layout = QHBoxLayout()
         self.setLayout(main_layout)
         main_layout.setContentsMargins(10, 10, 10, 10)
         main_layout.setSpacing(8)
 
-        # Scroll area for telemetry dashboard
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-
+        # One model/view grid paints every card, however many fields there are
         telemetry_group = QGroupBox("Telemetry Dashboard")
-        telemetry_layout = QGridLayout()
-        telemetry_layout.setHorizontalSpacing(20)
-        telemetry_layout.setVerticalSpacing(20)
-
-        # Arrange cards in 5 columns
-        for i, key in enumerate(self.telemetry_fields):
-            row = i // 5
-            col = i % 5
-
-            card = QGroupBox()
-            card.setMinimumSize(180, 90)  # smaller cards
-            card.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Minimum)
-
-            card.setStyleSheet("""
-                QGroupBox {
-                    background-color: #F5F7F9;
-                    border: 1px solid #CFD8DC;
-                    border-radius: 10px;
-                }
-            """)
-
-            card_layout = QVBoxLayout(card)
-            card_layout.setContentsMargins(10, 10, 10, 10)
-            card_layout.setSpacing(5)
-
-            label = QLabel(key)
-            label.setFont(QFont("Segoe UI", 10, QFont.Bold))
-            label.setWordWrap(True)
-            label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Maximum)
-
-            value = QLabel("N/A")
-            value.setFont(QFont("Segoe UI", 11))
-            value.setStyleSheet("color: #1E88E5;")
-            value.setWordWrap(True)
-            value.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Minimum)
-
-            self.labels[key] = label
-            self.values[key] = value
-
-            card_layout.addWidget(label)
-            card_layout.addWidget(value)
-            telemetry_layout.addWidget(card, row, col)
-
-        telemetry_group.setLayout(telemetry_layout)
-        scroll_area.setWidget(telemetry_group)
+        telemetry_layout = QVBoxLayout(telemetry_group)
+        self.grid_model = TelemetryGridModel(self.telemetry_fields, self.units, columns=5, parent=self)
+        self.grid_view = TelemetryGridView(self.grid_model)
+        telemetry_layout.addWidget(self.grid_view)
 
         # Right Panel with Save Button
         right_layout = QVBoxLayout()
         right_layout.setAlignment(Qt.AlignTop)
-        self.save_button = QPushButton("Save Data to CSV")
+        self.save_button = QPushButton("Save Data")
         self.save_button.clicked.connect(self.save_data)
         self.save_button.setMinimumHeight(45)
         right_layout.addWidget(self.save_button)
 
-        main_layout.addWidget(scroll_area, stretch=4)
+        # Export progress, shown only while a background export runs
+        self.export_progress = QProgressBar()
+        self.export_progress.setRange(0, 100)
+        self.export_progress.hide()
+        self.cancel_export_button = QPushButton("Cancel Export")
+        self.cancel_export_button.clicked.connect(self.cancel_export)
+        self.cancel_export_button.hide()
+        right_layout.addWidget(self.export_progress)
+        right_layout.addWidget(self.cancel_export_button)
+
+        main_layout.addWidget(telemetry_group, stretch=4)
         main_layout.addLayout(right_layout, stretch=1)
 
     def save_data(self):
-        if not self.data_store:
+        if not len(self.store):
             QMessageBox.warning(self, "Warning", "No data available to save.")
             return
+        if self.export_job and self.export_job.is_running():
+            return
 
         from PyQt5.QtWidgets import QFileDialog
         options = QFileDialog.Options()
-        csv_path, _ = QFileDialog.getSaveFileName(
-            self, "Save Data to CSV", os.path.join(os.path.expanduser("~"), "dashboard_data.csv"),
-            "CSV Files (*.csv);;All Files (*)", options=options
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save Data", os.path.join(os.path.expanduser("~"), "dashboard_data.csv"),
+            "CSV Files (*.csv);;Parquet Files (*.parquet);;HDF5 Files (*.h5);;All Files (*)", options=options
         )
-        if not csv_path:
+        if not path:
             return
 
-        try:
-            df = pd.DataFrame(self.data_store)
-            df.rename(columns=lambda c: f"{c} ({self.units.get(c,'')})" if self.units.get(c,"") else c, inplace=True)
-            df.to_csv(csv_path, index=False)
-            QMessageBox.information(self, "Success", f"Data saved to:\n{csv_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to save data: {e}")
-
-    @staticmethod
-    def convert_data(data: str, expected_type: str):
-        if expected_type == "string":
-            return str(data)
-        elif expected_type == "int":
-            return int(data)
-        elif expected_type == "float":
-            return float(data)
-        elif expected_type == "char":
-            return data[0] if len(data) > 0 else ''
-        elif expected_type == "uint8_t":
-            val = int(data)
-            return val if 0 <= val <= 255 else None
-        else:
-            return str(data)
+        # Runs on a worker thread; live telemetry keeps updating meanwhile
+        self.export_job = ExportJob(self.store, path, self.telemetry_fields, self.units, parent=self)
+        self.export_job.progress.connect(self.export_progress.setValue)
+        self.export_job.finished.connect(self.on_export_finished)
+        self.export_job.failed.connect(self.on_export_failed)
+        self.export_job.cancelled.connect(self.on_export_cancelled)
+        self.set_exporting(True)
+        self.export_job.start()
 
-    def update_data_store(self, telemetry_dict):
-        # Only update fields that exist in self.values
-        display_dict = {}
-        for key, value in telemetry_dict.items():
-            if key in self.values:
-                unit = self.units.get(key, "")
-                display_text = f"{value} {unit}" if unit else str(value)
-                self.values[key].setText(display_text)
-                display_dict[key] = value
-        self.data_store.append(display_dict)
-
-    def update_data(self, line: str):
-        try:
-            parts = line.strip().split(',')
+    def cancel_export(self):
+        if self.export_job:
+            self.export_job.cancel()
+
+    def set_exporting(self, exporting):
+        self.save_button.setEnabled(not exporting)
+        self.export_progress.setValue(0)
+        self.export_progress.setVisible(exporting)
+        self.cancel_export_button.setVisible(exporting)
 
-            telemetry_dict = {}
-            for i, key in enumerate(self.telemetry_fields):
-                if i < len(parts):
-                    value = parts[i].strip()
-                else:
-                    value = "N/A"  # Fill missing fields
+    def on_export_finished(self, path):
+        self.set_exporting(False)
+        QMessageBox.information(self, "Success", f"Data saved to:\n{path}")
 
-                # Optionally, clean the key name (remove leading/trailing spaces)
-                clean_key = key.strip()
-                telemetry_dict[clean_key] = value
+    def on_export_failed(self, message):
+        self.set_exporting(False)
+        QMessageBox.critical(self, "Error", f"Failed to save data: {message}")
 
-            self.update_data_store(telemetry_dict)
+    def on_export_cancelled(self):
+        self.set_exporting(False)
+
+    def set_refresh_rate(self, hz):
+        self.render_target.set_max_fps(hz)
+
+    def update_data_store(self, telemetry_dict):
+        # The model repaints only the cells whose value actually changed
+        self.grid_model.set_values(telemetry_dict)
+
+    def update_data(self, packets):
+        self.latest_packet = packets[-1]
+        self.render_target.mark_dirty()
+
+    def refresh(self):
+        packet, self.latest_packet = self.latest_packet, None
+        if packet is None:
+            return
+        try:
+            self.update_data_store(packet.to_dict())
         except Exception as e:
             print(f"[DbWindow] update_data error: {e}")
-
@@ -0,0 +1,344 @@
+# derived.py
+"""
+Derived telemetry channels.
+
+Each channel is a declaration: a name, a unit, the channels it reads and
+how to compute it. DerivedEngine evaluates all of them a batch at a time
+with NumPy on the serial reader thread (SerialManager.publish), carrying
+filter state between batches, and attaches the results to the packets
+so every page reads them like downlink fields: packet["Vertical Speed"].
+They are also stored as columns of the TelemetryStore.
+
+To add a channel, append a definition to DERIVED_CHANNELS. Definitions
+may read earlier derived channels. A definition may also produce several
+channels at once (Attitude), listed in its `outputs`.
+"""
+import math
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from telemetry import FIELD_INDEX
+
+
+SEA_LEVEL_PRESSURE = 101325.0  # Pa, ISA
+_BLOCK = 64  # samples per triangular block in ema()
+
+
+def pressure_altitude(pressure, sea_level=SEA_LEVEL_PRESSURE):
+    """Barometric formula (ISA troposphere), pressure in Pa -> altitude in m."""
+    return 44330.77 * (1.0 - np.power(pressure / sea_level, 0.190263))
+
+
+def norm(x, y, z):
+    return np.sqrt(x * x + y * y + z * z)
+
+
+def ema(x, dt, tau, last):
+    """
+    Time-constant tau exponential moving average over a batch, vectorized.
+
+    alpha varies per sample with dt, so the recurrence is unrolled block by
+    block into a lower-triangular weight matrix in log space. NaN inputs
+    hold the previous output. Returns (y, new last).
+    """
+    alpha = 1.0 - np.exp(-np.maximum(dt, 0.0) / tau)
+    missing = np.isnan(x)
+    alpha[missing] = 0.0
+    x = np.where(missing, 0.0, x)
+    if np.isnan(last):
+        # Seed from the first real sample
+        first = np.flatnonzero(~missing)
+        if not len(first):
+            return np.full(len(x), np.nan), last
+        alpha[first[0]] = 1.0
+        last = 0.0
+
+    y = np.empty(len(x))
+    for start in range(0, len(x), _BLOCK):
+        a = alpha[start:start + _BLOCK]
+        # log of prod(1 - alpha) up to each sample; alpha == 1 resets the history
+        keep = np.log(np.maximum(1.0 - a, 1e-300))
+        cum = np.cumsum(keep)
+        n = len(a)
+        lower = np.tril(np.ones((n, n), dtype=bool))
+        weights = np.exp(np.where(lower, cum[:, None] - cum[None, :], -np.inf)) * a[None, :]
+        block = weights @ x[start:start + _BLOCK] + np.exp(cum) * last
+        y[start:start + _BLOCK] = block
+        last = block[-1]
+    return y, last
+
+
+def quat_multiply(p, q):
+    """Hamilton product of (..., 4) arrays of (w, x, y, z) quaternions."""
+    pw, px, py, pz = np.moveaxis(p, -1, 0)
+    qw, qx, qy, qz = np.moveaxis(q, -1, 0)
+    return np.stack((
+        pw * qw - px * qx - py * qy - pz * qz,
+        pw * qx + px * qw + py * qz - pz * qy,
+        pw * qy - px * qz + py * qw + pz * qx,
+        pw * qz + px * qy - py * qx + pz * qw,
+    ), axis=-1)
+
+
+def quat_scan(q):
+    """Running products q[0], q[0]q[1], q[0]q[1]q[2], ... in log2(n) vectorized steps."""
+    q = q.copy()
+    shift = 1
+    while shift < len(q):
+        q[shift:] = quat_multiply(q[:-shift], q[shift:])
+        shift *= 2
+    return q
+
+
+def quat_from_rates(w, dt):
+    """Rotation quaternions for body rates w (n, 3) in rad/s held for dt seconds."""
+    angle = np.linalg.norm(w, axis=1) * dt
+    half = 0.5 * angle
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = np.where(angle > 1e-12, np.sin(half) / angle, 0.5) * dt
+    return np.column_stack((np.cos(half), w * scale[:, None]))
+
+
+def quat_to_euler(q):
+    """(n, 4) quaternions -> roll, pitch, yaw in degrees (Z-Y-X order)."""
+    w, x, y, z = q.T
+    roll = np.arctan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y))
+    pitch = np.arcsin(np.clip(2 * (w * y - z * x), -1.0, 1.0))
+    yaw = np.arctan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z))
+    return np.degrees(roll), np.degrees(pitch), np.degrees(yaw)
+
+
+def body_up(q):
+    """The world up axis (0, 0, 1) seen in the body frame of each quaternion."""
+    w, x, y, z = q.T
+    return np.column_stack((2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)))
+
+
+class DerivedChannel(ABC):
+    """Base definition: name, unit and input channels."""
+
+    def __init__(self, name, unit, inputs, decimals=3):
+        self.name = name
+        self.unit = unit
+        self.inputs = tuple(inputs)
+        self.decimals = decimals
+        self.outputs = ((name, unit),)
+
+    def initial_state(self):
+        return None
+
+    @abstractmethod
+    def evaluate(self, inputs, dt, state):
+        """
+        Return (values, new state) for one batch; inputs are float arrays.
+        With several outputs, values is a sequence of arrays in output order.
+        """
+
+
+class Formula(DerivedChannel):
+    """Stateless, element-wise function of its inputs."""
+
+    def __init__(self, name, unit, inputs, function, decimals=3):
+        super().__init__(name, unit, inputs, decimals)
+        self.function = function
+
+    def evaluate(self, inputs, dt, state):
+        return self.function(*inputs), state
+
+
+class LowPass(DerivedChannel):
+    """First-order low-pass (EMA) of one input with time constant tau seconds."""
+
+    def __init__(self, name, unit, source, tau, decimals=3):
+        super().__init__(name, unit, (source,), decimals)
+        self.tau = tau
+
+    def initial_state(self):
+        return np.nan
+
+    def evaluate(self, inputs, dt, state):
+        return ema(inputs[0], dt, self.tau, state)
+
+
+class Rate(DerivedChannel):
+    """Time derivative of one input, low-passed with time constant tau seconds."""
+
+    def __init__(self, name, unit, source, tau, decimals=3):
+        super().__init__(name, unit, (source,), decimals)
+        self.tau = tau
+
+    def initial_state(self):
+        return (np.nan, np.nan)  # last input value, last filtered rate
+
+    def evaluate(self, inputs, dt, state):
+        last_value, last_rate = state
+        x = inputs[0]
+        previous = np.concatenate(([last_value], x[:-1]))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            raw = np.where(dt > 0, (x - previous) / dt, np.nan)
+        rate, last_rate = ema(raw, dt, self.tau, last_rate)
+        valid = np.flatnonzero(~np.isnan(x))
+        if len(valid):
+            last_value = x[valid[-1]]
+        return rate, (last_value, last_rate)
+
+
+class Attitude(DerivedChannel):
+    """
+    Orientation from the gyro and accelerometer: a Mahony complementary
+    filter, run on a batch at a time.
+
+    Within a block of samples the gyro rates are integrated as a running
+    quaternion product (quat_scan). The tilt error between the measured
+    gravity and the predicted one gives a feedback rate, plus an integral
+    term that tracks gyro bias. The block is then integrated again with
+    the corrected rates. The feedback within a block comes from the first
+    pass, which is fine while kp * block duration is well below 1 (64
+    samples at 200 Hz is 0.32 s). Samples whose acceleration is far from
+    1 g (launch, shocks) give no tilt feedback. Yaw has no absolute
+    reference and drifts with the gyro.
+
+    Outputs the quaternion (world frame: x, y horizontal, z up) and roll,
+    pitch and yaw in degrees.
+    """
+
+    block = 64
+
+    def __init__(self, accel=("Accel X", "Accel Y", "Accel Z"), gyro=("Gyro X", "Gyro Y", "Gyro Z"),
+                 kp=1.0, ki=0.05, gravity=9.80665, gate=0.25):
+        super().__init__("Attitude", "", tuple(accel) + tuple(gyro), decimals=4)
+        self.kp = kp
+        self.ki = ki
+        self.gravity = gravity
+        self.gate = gate
+        self.outputs = (
+            ("Attitude W", ""), ("Attitude X", ""), ("Attitude Y", ""), ("Attitude Z", ""),
+            ("Roll", "°"), ("Pitch", "°"), ("Yaw", "°"),
+        )
+
+    def initial_state(self):
+        return None, np.zeros(3)  # quaternion (None until the first accel fix), gyro bias rad/s
+
+    def evaluate(self, inputs, dt, state):
+        accel = np.column_stack(inputs[:3])
+        gyro = np.radians(np.column_stack(inputs[3:]))
+        q, bias = state
+        out = np.full((len(dt), 4), np.nan)
+        for start in range(0, len(dt), self.block):
+            end = start + self.block
+            q, bias = self._block(accel[start:end], gyro[start:end], dt[start:end], q, bias, out[start:end])
+        roll, pitch, yaw = quat_to_euler(out)
+        return (*out.T, roll, pitch, yaw), (q, bias)
+
+    def _block(self, accel, gyro, dt, q, bias, out):
+        if q is None:
+            # Level the first orientation from gravity, yaw 0
+            valid = np.flatnonzero(np.isfinite(accel).all(axis=1))
+            if not len(valid):
+                return q, bias
+            ax, ay, az = accel[valid[0]]
+            roll, pitch = math.atan2(ay, az), math.atan2(-ax, math.hypot(ay, az))
+            q = quat_multiply(
+                np.array([math.cos(pitch / 2), 0.0, math.sin(pitch / 2), 0.0]),
+                np.array([math.cos(roll / 2), math.sin(roll / 2), 0.0, 0.0]),
+            )
+            accel, gyro, dt, out = accel[valid[0]:], gyro[valid[0]:], dt[valid[0]:].copy(), out[valid[0]:]
+            dt[0] = 0.0
+
+        gyro = np.where(np.isfinite(gyro), gyro, 0.0) - bias
+        dt = np.where(np.isfinite(dt), dt, 0.0)
+        predicted = quat_multiply(q, quat_scan(quat_from_rates(gyro, dt)))
+
+        # Tilt error: measured gravity direction x predicted gravity direction
+        magnitude = np.linalg.norm(accel, axis=1)
+        usable = np.isfinite(magnitude) & (np.abs(magnitude - self.gravity) < self.gate * self.gravity)
+        measured = np.where(usable[:, None], accel / np.where(usable, magnitude, 1.0)[:, None], 0.0)
+        error = np.cross(measured, body_up(predicted))
+
+        bias = bias - self.ki * (error * dt[:, None]).sum(axis=0)
+        corrected = quat_multiply(q, quat_scan(quat_from_rates(gyro + self.kp * error, dt)))
+        corrected /= np.linalg.norm(corrected, axis=1, keepdims=True)
+        out[:] = corrected
+        return corrected[-1], bias
+
+
+DERIVED_CHANNELS = (
+    Formula("Pressure Altitude", "m", ("Pressure",), pressure_altitude, decimals=2),
+    Rate("Vertical Speed", "m/s", "Altitude", tau=0.5, decimals=2),
+    Formula("Accel Magnitude", "m/s²", ("Accel X", "Accel Y", "Accel Z"), norm),
+    Formula("Rotation Rate", "°/s", ("Gyro X", "Gyro Y", "Gyro Z"), norm),
+    LowPass("Accel X Filtered", "m/s²", "Accel X", tau=0.1),
+    LowPass("Accel Y Filtered", "m/s²", "Accel Y", tau=0.1),
+    LowPass("Accel Z Filtered", "m/s²", "Accel Z", tau=0.1),
+    LowPass("Gyro X Filtered", "°/s", "Gyro X", tau=0.1),
+    LowPass("Gyro Y Filtered", "°/s", "Gyro Y", tau=0.1),
+    LowPass("Gyro Z Filtered", "°/s", "Gyro Z", tau=0.1),
+    Attitude(),
+)
+
+DERIVED_NAMES = tuple(name for channel in DERIVED_CHANNELS for name, _ in channel.outputs)
+DERIVED_UNITS = {name: unit for channel in DERIVED_CHANNELS for name, unit in channel.outputs}
+
+
+class DerivedEngine:
+    """Evaluates DERIVED_CHANNELS over packet batches, keeping filter state."""
+
+    def __init__(self, channels=DERIVED_CHANNELS):
+        self.channels = tuple(channels)
+        self.names = tuple(name for channel in self.channels for name, _ in channel.outputs)
+        derived = set(self.names)
+        self.fields = sorted({name for channel in self.channels for name in channel.inputs} - derived)
+        self.reset()
+
+    def reset(self):
+        self.states = {channel.name: channel.initial_state() for channel in self.channels}
+        self.last_time = None
+
+    def sample_times(self, rx_times):
+        """
+        Per-packet times. Packets read in the same block share one rx_time,
+        so each run of equal times is spread evenly back to the previous run.
+        """
+        t = np.asarray(rx_times, dtype=np.float64)
+        values, starts, counts = np.unique(t, return_index=True, return_counts=True)
+        if len(values) != len(t) and np.all(t[1:] >= t[:-1]):
+            previous = np.concatenate(([values[0] if self.last_time is None else self.last_time], values[:-1]))
+            run = np.repeat(np.arange(len(values)), counts)
+            step = (np.arange(len(t)) - starts[run] + 1) / counts[run]
+            t = previous[run] + (values[run] - previous[run]) * step
+        return t
+
+    def process(self, packets):
+        """Compute every derived channel for a batch; returns name -> array and sets packet.derived."""
+        if not packets:
+            return {}
+        columns = {
+            name: np.array([np.nan if v is None else v for v in (p.values[FIELD_INDEX[name]] for p in packets)],
+                           dtype=np.float64)
+            for name in self.fields
+        }
+        t = self.sample_times([packet.rx_time for packet in packets])
+        dt = np.diff(t, prepend=t[0] if self.last_time is None else self.last_time)
+        self.last_time = t[-1]
+
+        out = {}
+        for channel in self.channels:
+            names = [name for name, _ in channel.outputs]
+            try:
+                values, self.states[channel.name] = channel.evaluate(
+                    [columns[name] for name in channel.inputs], dt, self.states[channel.name]
+                )
+                if len(names) == 1:
+                    values = (values,)
+                values = [np.round(v, channel.decimals) for v in values]
+            except Exception as e:
+                print(f"[DerivedEngine] {channel.name} error: {e}")
+                values = [np.full(len(packets), np.nan) for _ in names]
+            for name, v in zip(names, values):
+                columns[name] = out[name] = v
+
+        rows = zip(*(values.tolist() for values in out.values()))
+        for packet, row in zip(packets, rows):
+            packet.derived = {name: None if v != v else v for name, v in zip(self.names, row)}
+        return out
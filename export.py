@@ -0,0 +1,183 @@
+# export.py
+"""
+Background export of the telemetry store to CSV, Parquet or HDF5.
+
+The job snapshots the row count when it starts and streams the store in
+batches from a worker thread, so live ingest keeps appending while the
+file is written. Progress and completion are reported through Qt signals.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from store import INT_MISSING
+
+
+FORMATS = {".csv": "csv", ".parquet": "parquet", ".h5": "hdf5", ".hdf5": "hdf5"}
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class ExportJob(QObject):
+    progress = pyqtSignal(int)      # percent done
+    finished = pyqtSignal(str)      # output path
+    failed = pyqtSignal(str)        # error message
+    cancelled = pyqtSignal()
+
+    def __init__(self, store, path, fields, units=None, batch_rows=1 << 16, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.path = path
+        self.fields = list(fields)
+        self.units = units or {}
+        self.batch_rows = batch_rows
+        self.format = FORMATS.get(os.path.splitext(path)[1].lower(), "csv")
+
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def column_name(self, field):
+        unit = self.units.get(field, "")
+        return f"{field} ({unit})" if unit else field
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def run(self):
+        total = len(self.store)
+        writer = {"csv": self._write_csv, "parquet": self._write_parquet, "hdf5": self._write_hdf5}[self.format]
+        try:
+            writer(self._batches(total), total)
+        except ExportCancelled:
+            self._remove_partial()
+            self.cancelled.emit()
+        except Exception as e:
+            self._remove_partial()
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(self.path)
+
+    def _batches(self, total):
+        """Yield (rows done, raw column batch) and report progress."""
+        last_percent = -1
+        for start in range(0, total, self.batch_rows):
+            if self._cancel.is_set():
+                raise ExportCancelled()
+            stop = min(start + self.batch_rows, total)
+            yield stop, self.store.rows(start, stop, self.fields)
+            percent = stop * 100 // total
+            if percent != last_percent:
+                self.progress.emit(percent)
+                last_percent = percent
+
+    def _frame(self, batch):
+        """DataFrame with decoded strings, nullable ints and unit-suffixed names."""
+        columns = {}
+        for field in self.fields:
+            values = batch[field]
+            if values.dtype.kind == "S":
+                values = np.char.decode(values, "utf-8", "ignore")
+            elif values.dtype.kind == "i":
+                values = pd.arrays.IntegerArray(values, values == INT_MISSING)
+            columns[self.column_name(field)] = values
+        return pd.DataFrame(columns, copy=False)
+
+    def _table(self, pa, batch):
+        """Arrow table built straight from the store's arrays (no pandas round trip)."""
+        arrays = []
+        for field in self.fields:
+            values = batch[field]
+            if values.dtype.kind == "S":
+                arrays.append(pa.array(values.tolist(), pa.binary()).cast(pa.string()))
+            elif values.dtype.kind == "i":
+                arrays.append(pa.array(values, mask=values == INT_MISSING))
+            else:
+                arrays.append(pa.array(values, from_pandas=True))  # NaN -> null
+        return pa.Table.from_arrays(arrays, [self.column_name(f) for f in self.fields])
+
+    def _write_csv(self, batches, total):
+        try:
+            import pyarrow as pa
+            import pyarrow.csv as pa_csv
+        except ImportError:
+            pa = None  # pandas fallback, roughly 10x slower
+
+        if pa is not None:
+            writer = None
+            with open(self.path, "wb") as f:
+                try:
+                    for _, batch in batches:
+                        table = self._table(pa, batch)
+                        if writer is None:
+                            # Unquoted header and cells like the pandas output, so
+                            # ReplaySource recognizes the file and strings replay as-is
+                            f.write((",".join(table.column_names) + "\n").encode("utf-8"))
+                            options = pa_csv.WriteOptions(include_header=False, quoting_style="none")
+                            writer = pa_csv.CSVWriter(f, table.schema, write_options=options)
+                        writer.write_table(table)
+                finally:
+                    if writer is not None:
+                        writer.close()
+            if writer is not None:
+                return
+
+        with open(self.path, "w", newline="", encoding="utf-8") as f:
+            header = True
+            for _, batch in batches:
+                self._frame(batch).to_csv(f, index=False, header=header)
+                header = False
+            if header:
+                pd.DataFrame(columns=[self.column_name(c) for c in self.fields]).to_csv(f, index=False)
+
+    def _write_parquet(self, batches, total):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        writer = None
+        try:
+            for _, batch in batches:
+                table = self._table(pa, batch)
+                if writer is None:
+                    writer = pq.ParquetWriter(self.path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def _write_hdf5(self, batches, total):
+        try:
+            import h5py
+        except ImportError:
+            raise RuntimeError("HDF5 export needs h5py (pip install h5py)")
+        # One compound dataset, so unit-suffixed names (e.g. "m/s²") need no escaping
+        dtype = np.dtype([(self.column_name(f), self.store.dtypes[f]) for f in self.fields])
+        with h5py.File(self.path, "w") as f:
+            dataset = f.create_dataset("telemetry", (total,), dtype, chunks=True, compression="lzf")
+            dataset.attrs["int_missing"] = INT_MISSING
+            start = 0
+            for stop, batch in batches:
+                rows = np.empty(stop - start, dtype)
+                for field in self.fields:
+                    rows[self.column_name(field)] = batch[field]
+                dataset[start:stop] = rows
+                start = stop
+
+    def _remove_partial(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
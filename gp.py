@@ -1,30 +1,54 @@
 # gp.py
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QGridLayout, QLabel
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QTableWidget, QTableWidgetItem, QHeaderView
+)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
+import numpy as np
 import pyqtgraph as pg
 
+from ingest import KEEP_ALL
+from lod import StoreHistory
+from render import get_render_scheduler
+from ring_buffer import RingBuffer
+from rolling import RollingStats
+from spectrum import SpectrumPanel
+
 
 class GraphsWindow(QWidget):
-    def __init__(self, serial_manager, parent=None):
+    def __init__(self, serial_manager, parent=None, window=500):
         super().__init__(parent)
         self.serial_manager = serial_manager
         self.setAttribute(Qt.WA_DeleteOnClose, False)
 
+        # Points kept (and drawn) per channel
+        self.window = window
         self.graphs = {}
         self.curves = {}
-        self.data = {}
+        self.buffers = {}
+        self.plot_labels = {}
+        # Channels with new points since the last redraw
+        self.dirty = set()
         self.serial_data = []
+        self.serial_dirty = False
+
+        # Vibration diagnostics on the raw IMU channels
+        self.imu_channels = ["Accel X", "Accel Y", "Accel Z", "Gyro X", "Gyro Y", "Gyro Z"]
+        self.stat_names = ["mean", "std", "min", "max", "rms"]
+        self.rolling = {channel: RollingStats(1024) for channel in self.imu_channels}
 
         # Define six graphs with telemetry labels
         self.graph_specs = [
             ("Pressure [Pa]", ["Pressure"]),
-            ("Altitude [m]", ["Altitude"]),
+            ("Altitude [m]", ["Altitude", "Pressure Altitude"]),
+            ("Vertical Speed [m/s]", ["Vertical Speed"]),
             ("Voltage [V]", ["Voltage"]),
-            ("Accelerometer [m/s²]", ["AccX", "AccY", "AccZ"]),
-            ("Gyroscope [rad/s]", ["GyroX", "GyroY", "GyroZ"]),
+            ("Accelerometer [m/s²]", ["Accel X", "Accel Y", "Accel Z"]),
+            ("Gyroscope [°/s]", ["Gyro X", "Gyro Y", "Gyro Z"]),
             ("Temperature [°C]", ["Temperature"]),
-            ("Magnitude [m/s²]", ["Magnitude"])
+            ("Magnitude [m/s²]", ["Accel Magnitude"]),
+            ("Rotation Rate [°/s]", ["Rotation Rate"]),
+            ("Attitude [°]", ["Roll", "Pitch", "Yaw"]),
         ]
 
         # Layout
@@ -32,24 +56,51 @@ class GraphsWindow(QWidget):
         grid_layout = QGridLayout()
         grid_layout.setSpacing(15)
 
-        positions = [(i // 5, i % 5) for i in range(len(self.graph_specs))]
+        positions = [(i // 5, i % 5) for i in range(len(self.graph_specs) + 1)]
         for pos, (title, labels) in zip(positions, self.graph_specs):
             graph = self.create_graph(title, labels)
             grid_layout.addWidget(graph, *pos)
 
+        self.spectrum = SpectrumPanel(self.imu_channels, size=512)
+        grid_layout.addWidget(self.spectrum, *positions[-1])
+
+        # Rolling statistics, one row per IMU channel
+        self.stats_table = QTableWidget(len(self.imu_channels), len(self.stat_names))
+        self.stats_table.setVerticalHeaderLabels(self.imu_channels)
+        self.stats_table.setHorizontalHeaderLabels([name.upper() for name in self.stat_names])
+        self.stats_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.stats_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.stats_table.setMaximumHeight(200)
+        for row in range(len(self.imu_channels)):
+            for col in range(len(self.stat_names)):
+                self.stats_table.setItem(row, col, QTableWidgetItem("-"))
+
         # Serial monitor
         self.serial_monitor = QLabel("Serial Monitor:\n")
         self.serial_monitor.setStyleSheet("color: black; background-color: white; padding: 6px;")
         self.serial_monitor.setFont(QFont("Arial", 10))
 
+        bottom_layout = QHBoxLayout()
+        bottom_layout.addWidget(self.serial_monitor, 1)
+        bottom_layout.addWidget(self.stats_table, 2)
+
+        # Whole-flight history, drawn once the user zooms or pans: min/max
+        # levels in memory, raw samples read back from the telemetry store
+        self.history = StoreHistory(self.serial_manager.store, self.buffers)
+
         main_layout.addLayout(grid_layout)
-        main_layout.addWidget(self.serial_monitor)
+        main_layout.addLayout(bottom_layout)
         self.setLayout(main_layout)
 
         # Connect serial manager
-        
-        self.serial_manager.data_received.connect(self.on_serial_data)
-       
+        self.ingest = self.serial_manager.subscribe(self.on_serial_data, policy=KEEP_ALL, name="graphs")
+
+        # Redrawn by the shared frame scheduler, only while visible; statistics
+        # and spectrum are throttled well below the frame rate
+        scheduler = get_render_scheduler()
+        self.render_target = scheduler.register(self, self.redraw)
+        self.analysis_target = scheduler.register(self, self.refresh_analysis, max_fps=4)
+
     def create_graph(self, title, labels):
         plot_widget = pg.PlotWidget(title=title)
         plot_widget.showGrid(x=True, y=True)
@@ -58,9 +109,14 @@ class GraphsWindow(QWidget):
         if len(labels) > 1:
             plot_widget.addLegend(offset=(10, 10))
 
+        # Following the live window while x auto-range is on; once the user
+        # zooms or pans, the visible range is drawn from the history pyramids
+        self.plot_labels[plot_widget] = labels
+        plot_widget.getViewBox().sigXRangeChanged.connect(lambda *_: self.mark_dirty(labels))
+
         colors = ['r', 'g', 'b', 'y', 'c', 'm', 'w']
         for i, label in enumerate(labels):
-            self.data[label] = {"x": [], "y": []}
+            self.buffers[label] = RingBuffer(self.window)
             curve = plot_widget.plot(
                 [], [], pen=pg.mkPen(color=colors[i % len(colors)], width=2),
                 name=label
@@ -70,93 +126,85 @@ class GraphsWindow(QWidget):
 
         return plot_widget
 
-    def on_serial_data(self, line: str):
+    def set_refresh_rate(self, hz):
+        self.render_target.set_max_fps(hz)
+
+    def mark_dirty(self, keys):
+        self.dirty.update(keys)
+        self.render_target.mark_dirty()
+
+    def set_window(self, points):
+        """Change how many points the live view keeps, keeping the newest."""
+        self.window = points
+        for buffer in self.buffers.values():
+            buffer.resize(points)
+        self.mark_dirty(self.buffers)
+
+    def on_serial_data(self, packets):
         """
-        Expected format (example):
-        TEAM123,1000,1,107,100249,28,3.30,12:34:56,23.123456,72.987654,122,9,8,-7,-1,190,-85,242,ASCENT
-
-        Mapping (example indices):
-        [1]  Packet counter
-        [4]  Pressure
-        [5]  Temperature
-        [6]  Voltage
-        [11] Altitude
-        [12-14] AccX, AccY, AccZ
-        [15-17] GyroX, GyroY, GyroZ
+        Append a batch of decoded packets to the live buffers and catch the
+        history up with the store. x = store row number (packet.seq), the
+        history's x as well: unlike Packet Count it never goes backwards on
+        reordered packets or a flight computer reset.
+        Channels are read by name, downlink fields and derived channels alike.
+        Nothing is drawn here; redraw() picks up the dirty channels.
         """
         try:
-            parts = line.strip().split(",")
-            if len(parts) < 18:
-                return
-
-            t = int(parts[1])            # packet number
-            pressure = float(parts[4])
-            temp = float(parts[5])
-            voltage = float(parts[6])
-            altitude = float(parts[11])
-            accx, accy, accz = float(parts[12]), float(parts[13]), float(parts[14])
-            gyrox, gyroy, gyroz = float(parts[15]), float(parts[16]), float(parts[17])
-            magnitude = float((accx**2 + accy**2 + accz**2)**0.5)   
-
-            values = {
-                "Pressure": pressure,
-                "Temperature": temp,
-                "Voltage": voltage,
-                "Altitude": altitude,
-                "AccX": accx, "AccY": accy, "AccZ": accz,
-                "GyroX": gyrox, "GyroY": gyroy, "GyroZ": gyroz,
-                "Magnitude": (accx**2 + accy**2 + accz**2)**0.5
-                
-            }
-
-            for key, val in values.items():
-                if key not in self.data:
-                    continue
-                self.data[key]["x"].append(t)
-                self.data[key]["y"].append(val)
-
-                # Keep only last 500 points
-                if len(self.data[key]["x"]) > 500:
-                    self.data[key]["x"] = self.data[key]["x"][-500:]
-                    self.data[key]["y"] = self.data[key]["y"][-500:]
-
-                self.curves[key].setData(self.data[key]["x"], self.data[key]["y"])
-
-            # Update serial monitor
-            self.serial_data.append(line)
-            if len(self.serial_data) > 2:
-                self.serial_data = self.serial_data[-2:]
-            self.serial_monitor.setText("Serial Monitor:\n" + "\n".join(self.serial_data))
+            x = np.array([np.nan if p.seq is None else p.seq for p in packets], dtype=np.float64)
+            rx_time = np.array([packet.rx_time for packet in packets], dtype=np.float64)
+            for key in self.buffers:
+                y = self.column(packets, key)
+                valid = ~(np.isnan(x) | np.isnan(y))
+                if valid.any():
+                    self.buffers[key].extend(x[valid], y[valid])
+                    self.mark_dirty((key,))
+                if key in self.rolling:
+                    present = ~np.isnan(y)
+                    self.rolling[key].extend(rx_time[present], y[present])
+
+            self.history.update()
+
+            self.serial_data.extend(packet.raw for packet in packets[-2:])
+            self.serial_data = self.serial_data[-2:]
+            self.serial_dirty = True
+            self.render_target.mark_dirty()
+            self.analysis_target.mark_dirty()
 
         except Exception as e:
-            print(f"[GraphsWindow] Error parsing line: {line} ({e})")
-
-    
-            self.serial_manager.data_received.disconnect(self.on_serial_data)
-    # utils.py
-    def convert_data(data: str, expected_type: str):
-    
-        if expected_type == "string":
-            return str(data)
-
-        elif expected_type == "int":
-            return int(data)
-
-        elif expected_type == "float":
-            return float(data)
-
-        elif expected_type == "char":
-            return data[0] if len(data) > 0 else ''
-
-        elif expected_type == "uint8_t":
-            val = int(data)
-            return val if 0 <= val <= 255 else None
-
-        else:
-            # fallback
-            return str(data)
-
-   
-
-       
-       
+            print(f"[GraphsWindow] Error plotting packets: {e}")
+
+    @staticmethod
+    def column(packets, key):
+        """One field across a batch as float64, missing values as NaN."""
+        values = [packet.get(key) for packet in packets]
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+    def redraw(self):
+        for plot_widget, labels in self.plot_labels.items():
+            keys = self.dirty.intersection(labels)
+            if not keys:
+                continue
+            view_box = plot_widget.getViewBox()
+            following = view_box.autoRangeEnabled()[0]
+            if not following:
+                x0, x1 = view_box.viewRange()[0]
+                max_points = max(int(view_box.width()), 100) * 2
+            for key in keys:
+                if following:
+                    self.curves[key].setData(*self.buffers[key].view())
+                else:
+                    self.curves[key].setData(*self.history.query(key, x0, x1, max_points))
+        self.dirty.clear()
+
+        if self.serial_dirty:
+            self.serial_monitor.setText("Serial Monitor:\n" + "\n".join(self.serial_data))
+            self.serial_dirty = False
+
+    def refresh_analysis(self):
+        for row, channel in enumerate(self.imu_channels):
+            stats = self.rolling[channel].stats()
+            if stats is None:
+                continue
+            for col, name in enumerate(self.stat_names):
+                self.stats_table.item(row, col).setText(f"{stats[name]:.3f}")
+        self.spectrum.refresh({channel: stats.samples for channel, stats in self.rolling.items()})
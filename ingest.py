@@ -0,0 +1,91 @@
+# ingest.py
+from collections import deque
+import threading
+
+
+# Drop policies for an IngestQueue
+KEEP_ALL = "keep_all"        # lossless up to a high-water cap (a stalled GUI), then drops oldest
+DROP_OLDEST = "drop_oldest"  # bounded; oldest packets fall off when full
+KEEP_LATEST = "keep_latest"  # display only; newer packets replace undelivered ones
+
+POLICIES = (KEEP_ALL, DROP_OLDEST, KEEP_LATEST)
+
+DEFAULT_MAXLEN = 1024
+KEEP_ALL_MAXLEN = 65536  # ~5 minutes at 200 Hz
+
+
+class IngestQueue:
+    """
+    Hand-off between the serial reader thread and one GUI consumer.
+
+    The reader thread calls put_many(); the GUI thread calls drain() once
+    per dispatch tick. Depth, drops and coalesced packets are counted so
+    overload is visible instead of turning into event-queue latency.
+    """
+
+    def __init__(self, name, policy=KEEP_LATEST, maxlen=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown drop policy: {policy}")
+        self.name = name
+        self.policy = policy
+        if policy == KEEP_LATEST:
+            self.maxlen = 1
+        else:
+            self.maxlen = maxlen or (KEEP_ALL_MAXLEN if policy == KEEP_ALL else DEFAULT_MAXLEN)
+        self._overflowing = False
+
+        self._items = deque()
+        self._lock = threading.Lock()
+
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.high_water = 0
+
+    def put_many(self, items):
+        warn = False
+        with self._lock:
+            self.received += len(items)
+            self._items.extend(items)
+            excess = len(self._items) - self.maxlen
+            if excess > 0:
+                for _ in range(excess):
+                    self._items.popleft()
+                if self.policy == KEEP_LATEST:
+                    self.coalesced += excess
+                else:
+                    self.dropped += excess
+                    # Warn once per stall; drain() re-arms it
+                    warn = self.policy == KEEP_ALL and not self._overflowing
+                    self._overflowing = True
+            self.high_water = max(self.high_water, len(self._items))
+        if warn:
+            print(f"⚠️ [IngestQueue] {self.name} is not draining, dropping oldest packets past {self.maxlen}")
+
+    def put(self, item):
+        self.put_many((item,))
+
+    def drain(self):
+        """Take everything queued so far, oldest first."""
+        with self._lock:
+            items = list(self._items)
+            self._items.clear()
+            self._overflowing = False
+            self.delivered += len(items)
+        return items
+
+    @property
+    def depth(self):
+        return len(self._items)
+
+    def stats(self):
+        return {
+            "policy": self.policy,
+            "depth": self.depth,
+            "high_water": self.high_water,
+            "received": self.received,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
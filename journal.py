@@ -0,0 +1,256 @@
+# journal.py
+"""
+Append-only capture journal for raw downlink frames.
+
+A session is a directory of preallocated segment files plus a small seek
+index. Each record is the raw frame (a CSV line without its \r\n, or a
+COBS frame without its 0x00 delimiter) with the monotonic time it was
+received. Preallocated space reads as zeros, so after a crash the journal
+simply ends at the last record that reached the disk.
+"""
+import bisect
+import glob
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+
+SEGMENT_MAGIC = b"GSJ1"
+# magic, protocol ("csv"/"binary" padded), wall clock and monotonic clock at open
+SEGMENT_HEADER = struct.Struct("<4s8sdd")
+# payload length (0 marks the end), crc32 of payload, monotonic receive time
+RECORD = struct.Struct("<IId")
+# segment number, byte offset, record number, receive time
+INDEX_ENTRY = struct.Struct("<IQQd")
+
+_STOP = object()
+_PROTOCOL = object()
+
+
+def segment_path(directory, number):
+    return os.path.join(directory, f"segment-{number:06d}.gsj")
+
+
+def _preallocate(f, size):
+    try:
+        os.posix_fallocate(f.fileno(), 0, size)
+    except (AttributeError, OSError):
+        f.truncate(size)
+
+
+class CaptureJournal:
+    """
+    Flight recorder. append() only enqueues, so the reader thread never
+    waits on the disk; a dedicated writer thread appends records, fsyncs
+    every fsync_interval seconds and adds an index entry every
+    index_interval seconds.
+    """
+
+    def __init__(self, directory, protocol="csv", segment_size=64 << 20,
+                 fsync_interval=1.0, index_interval=1.0):
+        self.directory = directory
+        self.protocol = protocol
+        self.segment_size = segment_size
+        self.fsync_interval = fsync_interval
+        self.index_interval = index_interval
+
+        self.records = 0
+        self.bytes_written = 0
+        self.segments = 0
+
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._segment = None
+        self._offset = 0
+        self._index = None
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._index = open(os.path.join(self.directory, "index.gsi"), "ab")
+        self._open_segment(0)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def append(self, frame, rx_time):
+        """
+        Called from the reader thread; never blocks. Empty frames (blank
+        lines) are dropped: a zero length record reads as the end of the
+        journal.
+        """
+        if frame:
+            self._queue.put((rx_time, frame))
+
+    def set_protocol(self, protocol):
+        """
+        Frames appended from now on are in protocol. Records already written
+        keep theirs: the writer starts a new segment unless the current one
+        is still empty, in which case its header is rewritten.
+        """
+        self._queue.put((_PROTOCOL, protocol))
+
+    def close(self):
+        if self._thread:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _open_segment(self, number):
+        self.segments = number + 1
+        self._segment_number = number
+        self._segment = open(segment_path(self.directory, number), "w+b")
+        _preallocate(self._segment, self.segment_size)
+        self._write_header()
+
+    def _write_header(self):
+        self._segment.seek(0)
+        self._segment.write(SEGMENT_HEADER.pack(
+            SEGMENT_MAGIC, self.protocol.encode(), time.time(), time.monotonic()
+        ))
+        self._offset = SEGMENT_HEADER.size
+
+    def _switch_protocol(self, protocol):
+        if protocol == self.protocol:
+            return
+        self.protocol = protocol
+        if self._offset == SEGMENT_HEADER.size:
+            self._write_header()
+        else:
+            self._close_segment()
+            self._open_segment(self._segment_number + 1)
+
+    def _close_segment(self):
+        self._sync()
+        self._segment.truncate(self._offset)
+        self._segment.close()
+        self._segment = None
+
+    def _sync(self):
+        for f in (self._segment, self._index):
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _run(self):
+        last_sync = last_index = time.monotonic()
+        stop = False
+        while not stop:
+            try:
+                item = self._queue.get(timeout=self.fsync_interval)
+            except queue.Empty:
+                item = None
+            while item is not None:
+                if item is _STOP:
+                    stop = True
+                    break
+                rx_time, frame = item
+                if rx_time is _PROTOCOL:
+                    self._switch_protocol(frame)
+                else:
+                    if rx_time - last_index >= self.index_interval:
+                        self._write_index(rx_time)
+                        last_index = rx_time
+                    self._write_record(rx_time, frame)
+                # Checked per record too: at a sustained rate the queue never drains
+                now = time.monotonic()
+                if now - last_sync >= self.fsync_interval:
+                    self._sync()
+                    last_sync = now
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+
+            now = time.monotonic()
+            if now - last_sync >= self.fsync_interval:
+                self._sync()
+                last_sync = now
+        self._close_segment()
+        self._index.close()
+
+    def _write_record(self, rx_time, frame):
+        size = RECORD.size + len(frame)
+        if self._offset + size + RECORD.size > self.segment_size:
+            self._close_segment()
+            self._open_segment(self._segment_number + 1)
+            self._write_index(rx_time)
+        self._segment.write(RECORD.pack(len(frame), zlib.crc32(frame), rx_time))
+        self._segment.write(frame)
+        self._offset += size
+        self.records += 1
+        self.bytes_written += size
+
+    def _write_index(self, rx_time):
+        self._index.write(INDEX_ENTRY.pack(self._segment_number, self._offset, self.records, rx_time))
+
+
+def _delimiter(protocol):
+    return b"\x00" if protocol == "binary" else b"\n"
+
+
+class JournalReader:
+    """Iterate a session's records in order, optionally starting at a receive time."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.segment_files = sorted(glob.glob(os.path.join(directory, "segment-*.gsj")))
+        self.index = []
+        index_path = os.path.join(directory, "index.gsi")
+        if os.path.exists(index_path):
+            with open(index_path, "rb") as f:
+                data = f.read()
+            usable = len(data) - len(data) % INDEX_ENTRY.size
+            self.index = [entry for entry in INDEX_ENTRY.iter_unpack(data[:usable])]
+        self._index_times = [entry[3] for entry in self.index]
+
+        # A session changes protocol only at a segment boundary
+        self.protocols = []
+        for path in self.segment_files:
+            with open(path, "rb") as f:
+                magic, protocol, _, _ = SEGMENT_HEADER.unpack(f.read(SEGMENT_HEADER.size))
+            self.protocols.append(protocol.rstrip(b"\x00").decode() if magic == SEGMENT_MAGIC else "csv")
+        self.protocol = self.protocols[0] if self.protocols else "csv"
+
+    @property
+    def delimiter(self):
+        return _delimiter(self.protocol)
+
+    def seek(self, rx_time):
+        """(segment number, offset, record number) of the last index entry at or before rx_time."""
+        i = bisect.bisect_right(self._index_times, rx_time) - 1
+        if i < 0:
+            return 0, SEGMENT_HEADER.size, 0
+        segment, offset, record, _ = self.index[i]
+        return segment, offset, record
+
+    def records(self, start_time=None):
+        """Yield (record number, rx_time, frame) in order."""
+        for _, record, rx_time, frame in self._records(start_time):
+            yield record, rx_time, frame
+
+    def delimited(self, start_time=None):
+        """Yield (rx_time, frame + delimiter), the delimiter following each segment's protocol."""
+        for segment, _, rx_time, frame in self._records(start_time):
+            yield rx_time, frame + _delimiter(self.protocols[segment])
+
+    def _records(self, start_time):
+        first, offset, record = self.seek(start_time) if start_time is not None else (0, SEGMENT_HEADER.size, 0)
+        for segment, path in enumerate(self.segment_files[first:], first):
+            with open(path, "rb") as f:
+                f.seek(offset)
+                while True:
+                    header = f.read(RECORD.size)
+                    if len(header) < RECORD.size:
+                        break
+                    length, crc, rx_time = RECORD.unpack(header)
+                    if length == 0:
+                        break  # preallocated tail
+                    frame = f.read(length)
+                    if len(frame) < length or zlib.crc32(frame) != crc:
+                        break  # torn write at crash time
+                    if start_time is None or rx_time >= start_time:
+                        yield segment, record, rx_time, frame
+                    record += 1
+            offset = SEGMENT_HEADER.size
@@ -0,0 +1,165 @@
+# landing.py
+"""
+Landing footprint prediction during descent.
+
+The recent GNSS track and altitude are fitted with straight lines to get
+the descent rate and the horizontal drift (the wind). predict_landing()
+then flies a few thousand Monte Carlo trajectories at once as NumPy
+arrays: each one perturbs the descent rate and lets the wind wander as a
+random walk from layer to layer on the way down. The spread of the
+landing points gives the footprint ellipse.
+"""
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from track import METERS_PER_DEG_LAT, METERS_PER_DEG_LON
+
+
+# "Altitude" is barometric, relative to the launch site
+GROUND_ALTITUDE = 0.0
+FOOTPRINT_PROBABILITY = 0.95
+
+
+def _fit(t, y):
+    """Least-squares line y = a + b*t; returns (a, b, standard error of b)."""
+    tm = t.mean()
+    dt = t - tm
+    sxx = float(dt @ dt)
+    b = float(dt @ (y - y.mean())) / sxx
+    a = float(y.mean()) - b * tm
+    residual = y - (a + b * t)
+    dof = max(len(t) - 2, 1)
+    return a, b, math.sqrt(float(residual @ residual) / dof / sxx)
+
+
+def predict_landing(t, lat, lon, alt, samples=4000, layers=12, ground_altitude=GROUND_ALTITUDE,
+                    descent_spread=0.1, wind_spread=1.0, wind_shear=0.02, min_descent_rate=1.0,
+                    probability=FOOTPRINT_PROBABILITY, rng=None):
+    """
+    Monte Carlo landing footprint from recent fixes (arrays of time, lat,
+    lon, altitude). Returns None unless the vehicle is clearly descending.
+
+    descent_spread is the relative 1-sigma error of the descent rate,
+    wind_spread the 1-sigma error (m/s) of the fitted wind, and wind_shear
+    how fast (m/s per sqrt(m) of altitude) the wind may drift on the way
+    down, on top of the fit's own standard errors.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    t = np.asarray(t, dtype=np.float64)
+    t = t - t[-1]
+    lat0, lon0 = float(lat[-1]), float(lon[-1])
+    scale = METERS_PER_DEG_LON * math.cos(math.radians(lat0))
+    east = (np.asarray(lon, dtype=np.float64) - lon0) * scale
+    north = (np.asarray(lat, dtype=np.float64) - lat0) * METERS_PER_DEG_LAT
+
+    alt_now, climb, climb_se = _fit(t, np.asarray(alt, dtype=np.float64))
+    height = alt_now - ground_altitude
+    descent = -climb
+    if descent < min_descent_rate or height <= 0:
+        return None
+    e_now, ve, ve_se = _fit(t, east)
+    n_now, vn, vn_se = _fit(t, north)
+
+    # Per-trajectory descent rate, and wind per altitude layer on the way down
+    rate = descent + rng.standard_normal(samples) * math.hypot(climb_se, descent * descent_spread)
+    rate = np.maximum(rate, 0.25 * descent)
+    layer_height = height / layers
+    walk = wind_shear * math.sqrt(layer_height)
+    wind = np.empty((2, samples, layers))
+    for axis, (v, se) in enumerate(((ve, ve_se), (vn, vn_se))):
+        wind[axis] = v + rng.standard_normal((samples, 1)) * math.hypot(se, wind_spread)
+        wind[axis] += np.cumsum(rng.standard_normal((samples, layers)) * walk, axis=1)
+    # Every layer takes layer_height / rate seconds to fall through
+    drift = wind.sum(axis=2) * (layer_height / rate)
+    landing_e = e_now + drift[0]
+    landing_n = n_now + drift[1]
+
+    # Ellipse holding `probability` of the landings, from the sample covariance
+    centre_e, centre_n = float(landing_e.mean()), float(landing_n.mean())
+    variance, axes = np.linalg.eigh(np.cov(landing_e, landing_n))
+    k = math.sqrt(-2.0 * math.log(1.0 - probability))
+    radii = k * np.sqrt(np.maximum(variance, 0.0))
+    angle = np.linspace(0.0, 2.0 * math.pi, 49)
+    ring = axes @ (radii[:, None] * np.vstack((np.cos(angle), np.sin(angle))))
+
+    def to_latlon(e, n):
+        return [lat0 + n / METERS_PER_DEG_LAT, lon0 + e / scale]
+
+    return {
+        "centre": to_latlon(centre_e, centre_n),
+        "ellipse": [to_latlon(centre_e + e, centre_n + n) for e, n in zip(ring[0].tolist(), ring[1].tolist())],
+        "axes_m": sorted(radii.tolist(), reverse=True),
+        "descent_rate": descent,
+        "wind": (ve, vn),
+        "time_to_land": float(np.median(height / rate)),
+        "distance_m": math.hypot(centre_e, centre_n),
+        "samples": samples,
+    }
+
+
+class LandingPredictor(QObject):
+    """
+    Keeps the last `window_s` seconds of fixes and re-runs predict_landing()
+    every `interval` seconds on a worker thread. Results arrive on the GUI
+    thread through `predicted`: a prediction dict, or None once there is
+    nothing to predict (not descending, or too few fixes).
+    """
+
+    predicted = pyqtSignal(object)
+
+    def __init__(self, interval=1.0, window_s=20.0, min_fixes=8, samples=4000, parent=None):
+        super().__init__(parent)
+        self.interval = interval
+        self.window_s = window_s
+        self.min_fixes = min_fixes
+        self.samples = samples
+        self.last_seconds = 0.0
+        self._fixes = deque()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._had_prediction = False
+
+    def add(self, fixes):
+        """Append (time, lat, lon, altitude) fixes."""
+        with self._lock:
+            self._fixes.extend(fixes)
+            if self._fixes:
+                cutoff = self._fixes[-1][0] - self.window_s
+                while self._fixes[0][0] < cutoff:
+                    self._fixes.popleft()
+
+    def clear(self):
+        with self._lock:
+            self._fixes.clear()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                fixes = np.array(self._fixes, dtype=np.float64) if len(self._fixes) >= self.min_fixes else None
+            prediction = None
+            if fixes is not None and np.ptp(fixes[:, 0]) > 0:
+                started = time.perf_counter()
+                try:
+                    prediction = predict_landing(*fixes.T, samples=self.samples)
+                except Exception as e:
+                    print(f"[LandingPredictor] prediction error: {e}")
+                self.last_seconds = time.perf_counter() - started
+            if prediction is not None or self._had_prediction:
+                self._had_prediction = prediction is not None
+                self.predicted.emit(prediction)
@@ -0,0 +1,216 @@
+# lod.py
+import numpy as np
+
+from store import INT_MISSING
+
+
+class _Column:
+    """Growable float64 array with amortized O(1) append."""
+
+    def __init__(self, capacity=1024):
+        self._data = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+
+    def extend(self, values):
+        n = len(values)
+        if self.size + n > len(self._data):
+            grown = np.empty(max(2 * len(self._data), self.size + n), dtype=np.float64)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+        self._data[self.size:self.size + n] = values
+        self.size += n
+
+    @property
+    def values(self):
+        return self._data[:self.size]
+
+
+def _min_max(values, width):
+    """Per-bucket min and max of `width` consecutive values, NaN only where a bucket is all NaN."""
+    groups = values[:len(values) // width * width].reshape(-1, width)
+    return np.fmin.reduce(groups, axis=1), np.fmax.reduce(groups, axis=1)
+
+
+class MinMaxPyramid:
+    """
+    Min/max level-of-detail levels over one column sampled at x = 0, 1,
+    2, ... (store row numbers).
+
+    Only levels >= 1 live in memory: level 1 holds one bucket per `base`
+    samples, each level above one per `factor` buckets of the level below,
+    and a bucket is just the min and max of its samples. The raw samples
+    stay in the TelemetryStore; query() reads them back through
+    read(start, stop) when the view is zoomed in far enough to need them.
+    Levels are extended incrementally, so appends stay cheap however long
+    the flight. Both the min and the max of every bucket are drawn, so
+    single-sample spikes survive any zoom level (stride downsampling would
+    drop them).
+    """
+
+    def __init__(self, factor=4, base=16):
+        self.factor = factor
+        self.base = base
+        self.size = 0
+        # Samples past the last complete level 1 bucket (fewer than base)
+        self._tail = np.empty(0, dtype=np.float64)
+        # Per level >= 1: min y, max y
+        self._levels = []
+
+    def __len__(self):
+        return self.size
+
+    def extend(self, y):
+        """Append the samples for rows len(self) onwards."""
+        y = np.concatenate((self._tail, np.asarray(y, dtype=np.float64)))
+        self.size += len(y) - len(self._tail)
+        complete = len(y) // self.base * self.base
+        self._tail = y[complete:].copy()
+        if complete:
+            if not self._levels:
+                self._levels.append((_Column(), _Column()))
+            lo, hi = _min_max(y[:complete], self.base)
+            self._levels[0][0].extend(lo)
+            self._levels[0][1].extend(hi)
+            self._cascade()
+
+    def clear(self):
+        self.__init__(self.factor, self.base)
+
+    def _cascade(self):
+        """Fold newly completed groups of each level into the level above."""
+        f = self.factor
+        level = 0
+        while self._levels[level][0].size >= f:
+            if level + 1 == len(self._levels):
+                self._levels.append((_Column(), _Column()))
+            below_lo, below_hi = (column.values for column in self._levels[level])
+            lo, hi = self._levels[level + 1]
+            done = lo.size * f
+            if len(below_lo) - done >= f:
+                lo.extend(_min_max(below_lo[done:], f)[0])
+                hi.extend(_min_max(below_hi[done:], f)[1])
+            level += 1
+
+    @property
+    def levels(self):
+        return len(self._levels)
+
+    def x_range(self):
+        if not self.size:
+            return None
+        return 0.0, float(self.size - 1)
+
+    def _width(self, level):
+        """Samples per bucket at self._levels[level]."""
+        return self.base * self.factor ** level
+
+    def query(self, x0, x1, read, max_points=2000):
+        """
+        Points to draw for the x range [x0, x1], at most about max_points.
+        read(start, stop) returns the raw samples of rows [start, stop).
+        Returns (x, y) arrays without NaN; the range is widened by one
+        sample each side so the line runs off the edge of the view instead
+        of stopping short.
+        """
+        n = self.size
+        start = min(max(int(np.ceil(x0)) - 1, 0), n)
+        stop = max(min(int(np.floor(x1)) + 2, n), start)
+        span = stop - start
+        if span <= max_points:
+            return self._finite(np.arange(start, stop, dtype=np.float64), read(start, stop))
+
+        buckets = max(max_points // 2, 1)
+        width = -(-span // buckets)
+        if width < self.base or not self._levels:
+            # Finer than level 1: bucket the raw samples on the fly
+            raw = read(start, stop)
+            lo, hi = _min_max(raw, width)
+            bx = start + np.arange(len(lo), dtype=np.float64) * width
+            tail = start + len(lo) * width
+            tail_lo, tail_hi = (np.fmin.reduce(raw[tail - start:]), np.fmax.reduce(raw[tail - start:])) \
+                if tail < stop else (np.nan, np.nan)
+        else:
+            # Finest level with at most `buckets` buckets in view
+            level = 0
+            while level + 1 < len(self._levels) and span / self._width(level) > buckets:
+                level += 1
+            width = self._width(level)
+            lo, hi = (column.values for column in self._levels[level])
+            b0 = start // width
+            b1 = min(-(-stop // width), len(lo))
+            bx = np.arange(b0, b1, dtype=np.float64) * width
+            lo, hi = lo[b0:b1], hi[b0:b1]
+            tail = b1 * width
+            tail_lo, tail_hi = self._envelope(tail, stop, level) if tail < stop else (np.nan, np.nan)
+
+        # Two points per bucket: min then max, sharing the bucket's x span
+        out_x = np.empty(2 * len(bx), dtype=np.float64)
+        out_y = np.empty(2 * len(bx), dtype=np.float64)
+        out_x[0::2] = bx
+        out_x[1::2] = bx
+        if len(bx) > 1:
+            out_x[1:-1:2] = (bx[:-1] + bx[1:]) / 2
+        out_y[0::2] = lo
+        out_y[1::2] = hi
+
+        # Samples past the last complete bucket in view, as one min/max pair
+        if tail < stop:
+            out_x = np.concatenate((out_x, (tail, stop - 1)))
+            out_y = np.concatenate((out_y, (tail_lo, tail_hi)))
+        return self._finite(out_x, out_y)
+
+    def _envelope(self, start, stop, level):
+        """Min and max of rows [start, stop) past the complete buckets of `level`, from the finer levels."""
+        lo = hi = np.nan
+        for finer in range(level - 1, -1, -1):
+            width = self._width(finer)
+            lows, highs = (column.values for column in self._levels[finer])
+            b1 = min(-(-stop // width), len(lows))
+            if start // width < b1:
+                lo = np.fmin(lo, np.fmin.reduce(lows[start // width:b1]))
+                hi = np.fmax(hi, np.fmax.reduce(highs[start // width:b1]))
+            start = max(start, b1 * width)
+        if start < stop and len(self._tail):
+            rest = self._tail[:stop - start]
+            lo = np.fmin(lo, np.fmin.reduce(rest))
+            hi = np.fmax(hi, np.fmax.reduce(rest))
+        return lo, hi
+
+    @staticmethod
+    def _finite(x, y):
+        keep = ~np.isnan(y)
+        return x[keep], y[keep]
+
+
+class StoreHistory:
+    """
+    Whole-flight history of a set of TelemetryStore columns, one
+    MinMaxPyramid each, all sharing the store row number as x. update()
+    folds in the rows appended since the last call.
+    """
+
+    def __init__(self, store, fields, factor=4, base=16):
+        self.store = store
+        self.fields = list(fields)
+        self.pyramids = {name: MinMaxPyramid(factor, base) for name in self.fields}
+        self.rows = 0
+
+    def update(self):
+        stop = len(self.store)
+        if stop <= self.rows:
+            return
+        for part in self.store.iter_chunks(self.rows, stop, self.fields):
+            for name, pyramid in self.pyramids.items():
+                pyramid.extend(self._floats(name, part[name]))
+        self.rows = stop
+
+    def query(self, name, x0, x1, max_points=2000):
+        read = lambda start, stop: self._floats(name, self.store.rows(start, stop, [name])[name])
+        return self.pyramids[name].query(x0, x1, read, max_points)
+
+    def _floats(self, name, values):
+        if self.store.dtypes[name].kind == "i":
+            missing = values == INT_MISSING
+            values = values.astype(np.float64)
+            values[missing] = np.nan
+        return values
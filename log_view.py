@@ -0,0 +1,189 @@
+# log_view.py
+"""
+Virtualized log view for the console.
+
+LineHistory keeps the newest lines in an in-memory ring and, optionally,
+every line in an append-only file on disk with a line-offset index, so
+older lines are paged back in on demand. LogView paints only the lines
+that are visible, so scrolling through millions of lines never builds a
+QTextDocument.
+"""
+import os
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict, deque
+
+from PyQt5.QtWidgets import QAbstractScrollArea
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont, QFontMetrics, QPainter, QColor
+
+
+class LineHistory:
+    def __init__(self, max_lines=10000, spill_to_disk=True, page_lines=256, cached_pages=8):
+        self.max_lines = max_lines
+        self.page_lines = page_lines
+        self.cached_pages = cached_pages
+
+        self._ring = deque(maxlen=max_lines)
+        self._count = 0
+        self._lock = threading.Lock()
+
+        self._path = None
+        self._file = None
+        self._offsets = array("Q")
+        self._pages = OrderedDict()
+        if spill_to_disk:
+            fd, self._path = tempfile.mkstemp(prefix="navigator-console-", suffix=".log")
+            self._file = os.fdopen(fd, "w+b")
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def path(self):
+        """The on-disk capture of every line, or None for ring-only histories."""
+        return self._path
+
+    @property
+    def first_in_memory(self):
+        return self._count - len(self._ring)
+
+    def append_lines(self, lines):
+        with self._lock:
+            if self._file is not None:
+                self._file.seek(0, os.SEEK_END)
+                offset = self._file.tell()
+                data = []
+                for line in lines:
+                    encoded = line.replace("\n", " ").encode("utf-8", "replace") + b"\n"
+                    self._offsets.append(offset)
+                    offset += len(encoded)
+                    data.append(encoded)
+                self._file.write(b"".join(data))
+            self._ring.extend(lines)
+            self._count += len(lines)
+
+    def line(self, i):
+        first = self.first_in_memory
+        if i >= first:
+            return self._ring[i - first]
+        if self._file is None:
+            return ""
+        page = i // self.page_lines
+        lines = self._pages.get(page)
+        if lines is None:
+            lines = self._read_page(page)
+            self._pages[page] = lines
+            if len(self._pages) > self.cached_pages:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page)
+        return lines[i - page * self.page_lines]
+
+    def _read_page(self, page):
+        start = page * self.page_lines
+        stop = min(start + self.page_lines, len(self._offsets))
+        with self._lock:
+            self._file.flush()
+            self._file.seek(self._offsets[start])
+            end = self._offsets[stop] if stop < len(self._offsets) else None
+            data = self._file.read() if end is None else self._file.read(end - self._offsets[start])
+        return data.decode("utf-8", "replace").split("\n")[:stop - start]
+
+    def snapshot(self):
+        """(path, line offsets, line count) for reading the on-disk history from another thread."""
+        with self._lock:
+            if self._file is None:
+                return None, array("Q"), self._count
+            self._file.flush()
+            return self._path, array("Q", self._offsets), self._count
+
+    def clear(self):
+        with self._lock:
+            self._ring.clear()
+            self._count = 0
+            self._pages.clear()
+            self._offsets = array("Q")
+            if self._file is not None:
+                self._file.seek(0)
+                self._file.truncate()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            os.remove(self._path)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class LogView(QAbstractScrollArea):
+    """Read-only log that paints only visible lines and follows the tail unless scrolled up."""
+
+    def __init__(self, history=None, parent=None):
+        super().__init__(parent)
+        self.history = history or LineHistory()
+        self.setFont(QFont("Consolas", 9))
+        self.line_height = QFontMetrics(self.font()).lineSpacing()
+        self.text_color = QColor("#000")
+        self.follow_tail = True
+        self.verticalScrollBar().valueChanged.connect(self._on_scrolled)
+        self.viewport().setCursor(Qt.IBeamCursor)
+
+    def visible_lines(self):
+        return max(1, self.viewport().height() // self.line_height)
+
+    def append_lines(self, lines):
+        """Append a batch of lines; call once per frame, not once per line."""
+        if not lines:
+            return
+        self.history.append_lines(lines)
+        self._update_scrollbar()
+        self.viewport().update()
+
+    def append(self, line):
+        self.append_lines([line])
+
+    def clear(self):
+        self.history.clear()
+        self.follow_tail = True
+        self._update_scrollbar()
+        self.viewport().update()
+
+    def _update_scrollbar(self):
+        bar = self.verticalScrollBar()
+        bar.blockSignals(True)
+        bar.setRange(0, max(0, len(self.history) - self.visible_lines()))
+        bar.setPageStep(self.visible_lines())
+        if self.follow_tail:
+            bar.setValue(bar.maximum())
+        bar.blockSignals(False)
+
+    def _on_scrolled(self, value):
+        self.follow_tail = value >= self.verticalScrollBar().maximum()
+        self.viewport().update()
+
+    def scroll_to_line(self, i):
+        self.follow_tail = False
+        self.verticalScrollBar().setValue(max(0, i - self.visible_lines() // 2))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_scrollbar()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.setFont(self.font())
+        painter.setPen(self.text_color)
+        first = self.verticalScrollBar().value()
+        last = min(len(self.history), first + self.visible_lines() + 1)
+        ascent = QFontMetrics(self.font()).ascent()
+        y = 2
+        for i in range(first, last):
+            painter.drawText(4, y + ascent, self.history.line(i))
+            y += self.line_height
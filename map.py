@@ -36,7 +36,7 @@ class MapPage(QWidget):
     def update_map(self, lat, lon):
         """Updates the map with new GPS data"""
         try:
-            map_obj = folium.Map(location=[lat, lon], zoom_start=15, tiles="Stamen Terrain")
+            map_obj = folium.Map(location=[lat, lon], zoom_start=15, tiles="OpenStreetMap")
             folium.Marker([lat, lon], popup="Rocket Position", icon=folium.Icon(color="red")).add_to(map_obj)
 
             map_obj.save(self.map_file_path)
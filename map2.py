@@ -1,42 +1,168 @@
+import json
 import os
-import folium
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QGroupBox, QSizePolicy
 )
-from PyQt5.QtCore import QUrl, QTimer, pyqtSignal
-from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtCore import QBuffer, QIODevice, QUrl, pyqtSignal
+from PyQt5.QtWebEngineCore import QWebEngineUrlRequestJob, QWebEngineUrlScheme, QWebEngineUrlSchemeHandler
+from PyQt5.QtWebEngineWidgets import QWebEngineProfile, QWebEngineView
 from PyQt5.QtGui import QFont
-import threading
-import time
+
+from ingest import KEEP_ALL
+from landing import LandingPredictor
+from render import get_render_scheduler
+from tiles import DEFAULT_CACHE, TileCache, fetch_tile
+from track import SimplifiedTrack
+
+
+# Static Leaflet page with bundled assets (web/), loaded once; updates are pushed
+# into it as JSON deltas
+MAP_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "map_view.html")
+TILE_SCHEME = b"tiles"
+# Zoom range of the Leaflet map; MAX_ZOOM must match maxZoom in map_view.html
+MIN_ZOOM = 2
+MAX_ZOOM = 19
+# Runtime tile fetching: few workers, as for prefetch(), and a failed tile
+# is not asked for again for MISS_RETRY_S seconds
+FETCH_WORKERS = 2
+MISS_RETRY_S = 60.0
+MAX_MISSES = 4096
+
+
+def register_tile_scheme():
+    """Declare the tiles: scheme; must run before the QApplication is created."""
+    scheme = QWebEngineUrlScheme(TILE_SCHEME)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Path)
+    scheme.setFlags(QWebEngineUrlScheme.SecureScheme | QWebEngineUrlScheme.LocalAccessAllowed)
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+
+class TileSchemeHandler(QWebEngineUrlSchemeHandler):
+    """
+    Serves tiles:osm/{z}/{x}/{y}.png from the local TileCache. With
+    online=True a tile that is not cached is fetched by a small shared
+    worker pool and cached for next time; requests for a tile already
+    being fetched wait for that fetch, and a tile that failed recently
+    fails at once. Otherwise the request simply fails and Leaflet leaves
+    the square blank.
+    """
+
+    _fetched = pyqtSignal(object, object)  # (z, x, y), tile bytes or None
+
+    def __init__(self, cache, online=False, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.online = online
+        self._pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="tiles")
+        self._waiting = {}  # (z, x, y) -> jobs waiting for its fetch
+        self._misses = OrderedDict()  # (z, x, y) -> monotonic time of the failed fetch
+        self._fetched.connect(self._on_fetched)
+
+    def requestStarted(self, job):
+        try:
+            _, z, x, y = job.requestUrl().path().rsplit(".", 1)[0].split("/")[-4:]
+            z, x, y = int(z), int(x), int(y)
+        except ValueError:
+            job.fail(QWebEngineUrlRequestJob.UrlInvalid)
+            return
+
+        tile = (z, x, y)
+        data = self.cache.get(z, x, y)
+        if data is not None:
+            self._reply(job, data)
+        elif tile in self._waiting:
+            self._waiting[tile].append(job)
+        elif self.online and not self._recently_missed(tile):
+            self._waiting[tile] = [job]
+            self._pool.submit(self._fetch, tile)
+        else:
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+
+    def _recently_missed(self, tile):
+        missed = self._misses.get(tile)
+        if missed is None:
+            return False
+        if time.monotonic() - missed < MISS_RETRY_S:
+            return True
+        del self._misses[tile]
+        return False
+
+    def _fetch(self, tile):
+        try:
+            data = fetch_tile(*tile)
+            self.cache.put(*tile, data)
+        except Exception as e:
+            print(f"[TileSchemeHandler] {tile} fetch error: {e}")
+            data = None
+        self._fetched.emit(tile, data)  # reply on the GUI thread
+
+    def _on_fetched(self, tile, data):
+        if data is None:
+            self._misses[tile] = time.monotonic()
+            self._misses.move_to_end(tile)
+            if len(self._misses) > MAX_MISSES:
+                self._misses.popitem(last=False)
+        for job in self._waiting.pop(tile, ()):
+            self._reply(job, data)
+
+    def _reply(self, job, data):
+        try:
+            if data is None:
+                job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+                return
+            buffer = QBuffer(job)
+            buffer.setData(data)
+            buffer.open(QIODevice.ReadOnly)
+            job.reply(b"image/png", buffer)
+        except RuntimeError:
+            pass  # the page dropped the request (scrolled away) before we answered
 
 
 class MapPage(QWidget):
-    
-    _map_ready = pyqtSignal(str)
 
-    def __init__(self, serial_manager, parent=None):
+    def __init__(self, serial_manager, parent=None, tile_cache=DEFAULT_CACHE):
         super().__init__(parent)
         self.serial_manager = serial_manager
 
+        # Tiles come from the local MBTiles cache through the tiles: scheme
+        self.tile_cache = TileCache(tile_cache)
+        self.tile_handler = TileSchemeHandler(self.tile_cache, parent=self)
+        QWebEngineProfile.defaultProfile().installUrlSchemeHandler(TILE_SCHEME, self.tile_handler)
+
         self.lat = 0.0
         self.lon = 0.0
         self.altitude = "0"
         self.flight_mode = "N/A"
-        self.zoom_level = 12
+        self.zoom_level = 15
+        self.follow = True
+        self.has_fix = False
 
-        self._map_lock = threading.Lock()
-        self._last_refresh = 0.0
-        self._refresh_interval = 0.5  # seconds min between refreshes
-        self._generating = False
+        # Changes since the last frame, sent in one nav.apply() call
+        self._delta = {}
+        self._page_ready = False
+
+        # Ground track, simplified as it grows; the page holds the vertices
+        # already sent for one level, so each frame only sends new ones
+        self.track = SimplifiedTrack()
+        self._track_level = None
+        self._track_sent = 0
+
+        # Landing footprint, re-predicted about once a second off the GUI thread
+        self.landing = LandingPredictor(parent=self)
+        self.landing.predicted.connect(self.on_landing_predicted)
 
         self.init_ui()
-        #self.setup_connections()
-        self._map_ready.connect(self._on_map_ready)
-        #self.serial_manager.data_received.connect(self.update_data)
 
-        # create initial map
-        self._enqueue_map_refresh()
+        # Labels and map are refreshed by the frame scheduler, only while visible
+        self.render_target = get_render_scheduler().register(self, self.refresh)
+
+        self.web_view.loadFinished.connect(self._on_load_finished)
+        self.web_view.setUrl(QUrl.fromLocalFile(MAP_PAGE))
+        self.landing.start()
 
     def init_ui(self):
         main_layout = QVBoxLayout(self)
@@ -53,8 +179,9 @@ class MapPage(QWidget):
 
         self.label_alt = QLabel("Altitude: --")
         self.label_mode = QLabel("Flight Mode: --")
+        self.label_landing = QLabel("Landing: --")
 
-        for label in (self.label_alt, self.label_mode):
+        for label in (self.label_alt, self.label_mode, self.label_landing):
             label.setFont(QFont("Nirmala Text", 11))
             label.setStyleSheet("color: #000;")
             telemetry_bar.addWidget(label)
@@ -65,12 +192,16 @@ class MapPage(QWidget):
         self.web_view = QWebEngineView()
         self.web_view.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
-        # Zoom buttons
+        # Zoom buttons, and re-centre on the vehicle after the user pans away
+        self.follow_btn = QPushButton("Follow")
+        self.follow_btn.setCheckable(True)
+        self.follow_btn.setChecked(True)
         self.zoom_in_btn = QPushButton("+")
         self.zoom_out_btn = QPushButton("-")
         for btn in (self.zoom_in_btn, self.zoom_out_btn):
             btn.setFixedSize(30, 30)
 
+        telemetry_bar.addWidget(self.follow_btn)
         telemetry_bar.addWidget(self.zoom_in_btn)
         telemetry_bar.addWidget(self.zoom_out_btn)
 
@@ -81,62 +212,43 @@ class MapPage(QWidget):
         # Add to main layout
         main_layout.addWidget(map_box)
 
-    
-        self.serial_manager.data_received.connect(self.update_location_map)
-        
+        # Lossless: every fix is a point on the track
+        self.serial_manager.subscribe(self.update_location_map, policy=KEEP_ALL, name="map")
 
+        self.follow_btn.toggled.connect(self.set_follow)
         self.zoom_in_btn.clicked.connect(self.zoom_in)
         self.zoom_out_btn.clicked.connect(self.zoom_out)
 
-    def update_location_map(self, data: str):
-        """
-        Parse incoming telemetry and update map/labels.
-        Expected format (from navg): 
-        TEAMID,PACKET_NO,...,LAT,LON,ALT,...,STATE
-        """
+    def update_location_map(self, packets):
+        """Queue the batch's GNSS fixes for the next frame."""
         try:
-            parts = data.strip().split(",")
-            if len(parts) < 11:
-                return  # not enough data
-
-            lat = float(parts[8])
-            lon = float(parts[9])
-            alt = parts[10]
-            mode = parts[-1] if len(parts) > 18 else "N/A"
-
-            # update state
-            self.lat = lat
-            self.lon = lon
-            self.altitude = alt
-            self.flight_mode = mode
-
-            self.update_labels()
-            self._enqueue_map_refresh()
+            fixes = []
+            landing_fixes = []
+            for packet in packets:
+                lat = packet["GNSS Latitude"]
+                lon = packet["GNSS Longitude"]
+                if lat is not None and lon is not None:
+                    fixes.append([lat, lon])
+                    altitude = packet["Altitude"]
+                    if altitude is not None:
+                        landing_fixes.append((packet.rx_time, lat, lon, altitude))
+            self.landing.add(landing_fixes)
+            packet = packets[-1]
+            self.altitude = packet.get("GNSS Altitude", "--")
+            self.flight_mode = packet.get("Flight State", "N/A")
+            if fixes:
+                self.lat, self.lon = fixes[-1]
+                self.has_fix = True
+                self.track.add_many(fixes)
+                self._delta["pos"] = fixes[-1]
+            self.render_target.mark_dirty()
 
         except Exception as e:
-            print(f"[MapPage] Error parsing data: {e}")
-            
-    def convert_data(data: str, expected_type: str):
-    
-        if expected_type == "string":
-            return str(data)
-
-        elif expected_type == "int":
-            return int(data)
-
-        elif expected_type == "float":
-            return float(data)
+            print(f"[MapPage] Error reading packet: {e}")
 
-        elif expected_type == "char":
-            return data[0] if len(data) > 0 else ''
-
-        elif expected_type == "uint8_t":
-            val = int(data)
-            return val if 0 <= val <= 255 else None
-
-        else:
-            # fallback
-            return str(data)
+    def refresh(self):
+        self.update_labels()
+        self.flush_delta()
 
     def update_labels(self):
         try:
@@ -145,52 +257,82 @@ class MapPage(QWidget):
         except Exception:
             pass
 
-    def _enqueue_map_refresh(self):
-        now = time.time()
-        if self._generating:
+    def flush_delta(self):
+        """Send everything that changed since the last frame as one JSON delta."""
+        if not self._page_ready:
             return
-        if now - self._last_refresh < self._refresh_interval:
-            delay_ms = int((self._refresh_interval - (now - self._last_refresh)) * 1000) + 10
-            QTimer.singleShot(delay_ms, self._start_map_generation_thread)
-        else:
-            self._start_map_generation_thread()
-
-    def _start_map_generation_thread(self):
-        if self._generating:
+        delta, self._delta = self._delta, {}
+        if self.has_fix:
+            track = self.track_delta()
+            if track["reset"] or track["append"] or "pos" in delta:
+                delta["track"] = track
+        if not delta:
             return
-        self._generating = True
-        t = threading.Thread(target=self._generate_map_html, daemon=True)
-        t.start()
-
-    def _generate_map_html(self):
+        if "pos" in delta:
+            delta["tooltip"] = f"Lat:{self.lat}, Lon:{self.lon}, Alt:{self.altitude}"
+            delta.setdefault("zoom", self.zoom_level)
         try:
-            m = folium.Map(location=[self.lat, self.lon], zoom_start=self.zoom_level)
-            folium.Marker(
-                [self.lat, self.lon],
-                tooltip=f"Lat:{self.lat}, Lon:{self.lon}, Alt:{self.altitude}"
-            ).add_to(m)
-
-            tmp_path = os.path.abspath("map.html")
-            m.save(tmp_path)
-            self._map_ready.emit(tmp_path)
-            self._last_refresh = time.time()
+            self.web_view.page().runJavaScript(f"nav.apply({json.dumps(delta)})", self._on_applied)
         except Exception as e:
-            print(f"[MapPage] Map generation error: {e}")
-        finally:
-            self._generating = False
+            print(f"[MapPage] Map update error: {e}")
+
+    def track_delta(self):
+        """Vertices the page has not seen yet, or the whole level if the zoom changed level."""
+        level_index = self.track.level_for_zoom(self.zoom_level, self.lat)
+        level = self.track.levels[level_index]
+        reset = level_index != self._track_level
+        if reset:
+            self._track_level = level_index
+            self._track_sent = 0
+        append = level.vertices[self._track_sent:]
+        self._track_sent = len(level.vertices)
+        return {"reset": reset, "append": append, "tail": level.latest}
+
+    def _on_applied(self, state):
+        # The map may have been zoomed or dragged in the page itself
+        if isinstance(state, dict):
+            zoom = int(state.get("zoom", self.zoom_level))
+            if zoom != self.zoom_level:
+                self.zoom_level = zoom
+                self.render_target.mark_dirty()  # the track level may need to change
+            follow = bool(state.get("follow", self.follow))
+            if follow != self.follow:
+                self.follow = follow
+                self.follow_btn.setChecked(follow)
+
+    def on_landing_predicted(self, prediction):
+        if prediction is None:
+            self.label_landing.setText("Landing: --")
+            self._queue(landing=None)
+            return
+        self.label_landing.setText(
+            f"Landing: {prediction['distance_m']:.0f} m away in {prediction['time_to_land']:.0f} s"
+            f" (±{prediction['axes_m'][0]:.0f} m)"
+        )
+        self._queue(landing={"centre": prediction["centre"], "ellipse": prediction["ellipse"]})
+
+    def _on_load_finished(self, ok):
+        if not ok:
+            print("[MapPage] Failed to load map page")
+            return
+        self._page_ready = True
+        self.render_target.mark_dirty()
 
-    def _on_map_ready(self, path):
-        try:
-            self.web_view.setUrl(QUrl.fromLocalFile(path))
-        except Exception as e:
-            print(f"[MapPage] Failed to set URL: {e}")
+    def _queue(self, **changes):
+        self._delta.update(changes)
+        self.render_target.mark_dirty()
+
+    def set_follow(self, follow):
+        if follow != self.follow:
+            self.follow = follow
+            if follow and self.has_fix and "pos" not in self._delta:
+                self._delta["pos"] = [self.lat, self.lon]
+            self._queue(follow=follow)
 
     def zoom_in(self):
-        if self.zoom_level < 20:
-            self.zoom_level += 1
-            self._enqueue_map_refresh()
+        if self.zoom_level + self._delta.get("zoom_by", 0) < MAX_ZOOM:
+            self._queue(zoom_by=self._delta.get("zoom_by", 0) + 1)
 
     def zoom_out(self):
-        if self.zoom_level > 2:
-            self.zoom_level -= 1
-            self._enqueue_map_refresh()
+        if self.zoom_level + self._delta.get("zoom_by", 0) > MIN_ZOOM:
+            self._queue(zoom_by=self._delta.get("zoom_by", 0) - 1)
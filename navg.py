@@ -7,9 +7,11 @@ from PyQt5.QtCore import QPropertyAnimation, QEasingCurve
 from db import DbWindow as DashboardWidget
 from cs import ConsoleWindow as ConsoleWidget
 from gp import GraphsWindow as GraphWidget
-from map2 import MapPage as MapWidget
-#from trajectory import TrajectoryWidget  
+from map2 import MapPage as MapWidget, register_tile_scheme
+from trajectory import TrajectoryWidget
 from serial_port import SerialManager
+from ingest import KEEP_LATEST
+from sources import PtyLoopback, ReplaySource, SyntheticSource
 # from resource_rc import *
 
 warnings.filterwarnings("ignore", category=UserWarning)
@@ -50,7 +52,7 @@ class CustomSlideMenu(QtWidgets.QWidget):
 class Ui_MainWindow(object):
     def setupUi(self, MainWindow):
         # Create a single SerialManager instance and pass it to pages
-        self.serial_manager = SerialManager()
+        self.serial_manager = SerialManager(read_mode="block")
 
         MainWindow.setObjectName("MainWindow")
         MainWindow.resize(1280, 750)
@@ -158,6 +160,13 @@ class Ui_MainWindow(object):
         baudLayout.addWidget(self.comboBox)
         groupBoxLayout.addWidget(self.groupBox1)
 
+        self.groupBox3 = QtWidgets.QGroupBox("PROTOCOL")
+        protocolLayout = QtWidgets.QVBoxLayout(self.groupBox3)
+        self.protocolBox = QtWidgets.QComboBox()
+        self.protocolBox.addItems(["CSV", "BINARY"])
+        protocolLayout.addWidget(self.protocolBox)
+        groupBoxLayout.addWidget(self.groupBox3)
+
         self.groupBox_10 = QtWidgets.QGroupBox()
         gridLayout = QtWidgets.QGridLayout(self.groupBox_10)
         self.CONNECT = QtWidgets.QPushButton("CONNECT")
@@ -212,7 +221,7 @@ class Ui_MainWindow(object):
         self.Cs = create_nav_button("Console", "web-programming.png")
         self.Gp = create_nav_button("Graphs", "graph1.png")
         self.map = create_nav_button("Map", "map1.png")
-        #self.trajectory = create_nav_button("Trajectory", "app-store.png")
+        self.trajectory = create_nav_button("Trajectory", "app-store.png")
         self.settings = QtWidgets.QPushButton("Settings")
         self.settings.setCheckable(True)
         sideMenuLayout.addWidget(self.settings)
@@ -240,13 +249,13 @@ class Ui_MainWindow(object):
         self.consolePage = ConsoleWidget(self.serial_manager)
         self.graphPage = GraphWidget(self.serial_manager)
         self.mapPage = MapWidget(self.serial_manager)
-        #self.trajectoryPage = TrajectoryWidget(self.serial_manager)
+        self.trajectoryPage = TrajectoryWidget(self.serial_manager)
 
         self.stackedWidget.addWidget(self.dashboardPage)   # index 0
         self.stackedWidget.addWidget(self.consolePage)    # index 1
         self.stackedWidget.addWidget(self.graphPage)      # index 2
         self.stackedWidget.addWidget(self.mapPage)        # index 3
-        #self.stackedWidget.addWidget(self.trajectoryPage) # index 4
+        self.stackedWidget.addWidget(self.trajectoryPage)  # index 4
         self.stackedWidget.setCurrentIndex(0)
         def on_nav_button_pressed(self, button):
           if button == self.Db:
@@ -268,7 +277,7 @@ class Ui_MainWindow(object):
         self.loggingGroup.buttonPressed.connect(self.handle_logging_toggle)
 
         try:
-            self.serial_manager.data_received.connect(self.log_data)
+            self.serial_manager.subscribe(self.log_data, policy=KEEP_LATEST, name="main window")
         except Exception:
             pass
 
@@ -316,10 +325,12 @@ class Ui_MainWindow(object):
                 self.CONNECT.setChecked(False)
                 return
             try:
+                self.serial_manager.protocol = self.protocolBox.currentText().lower()
                 self.serial_manager.connect(port, baudrate)
                 self.CONNECT.setText("DISCONNECT")
                 self.comboBox1.setEnabled(False)
                 self.comboBox.setEnabled(False)
+                self.protocolBox.setEnabled(False)
                 print(f"✅ Connected to {port} at {baudrate}")
             except Exception as e:
                 QtWidgets.QMessageBox.critical(None, "Connection Error", f"Could not open port:\n{e}")
@@ -327,12 +338,16 @@ class Ui_MainWindow(object):
         else:
             try:
                 self.serial_manager.disconnect()
+                if getattr(self, "loopback", None):
+                    self.loopback.close()
+                    self.loopback = None
             except Exception:
                 pass
             print("🔌 Disconnected")
             self.CONNECT.setText("CONNECT")
             self.comboBox1.setEnabled(True)
             self.comboBox.setEnabled(True)
+            self.protocolBox.setEnabled(True)
 
     def handle_logging_toggle(self, button):
         try:
@@ -353,15 +368,50 @@ class Ui_MainWindow(object):
         except Exception:
             pass
 
-    def log_data(self, data):
-        print(f"Received: {data}")
+    def connect_test_source(self, kind, rate=20.0, path=None, speed=1.0, protocol="csv"):
+        """Drive the app from a replay, synthetic or pty loopback source instead of a radio."""
+        self.serial_manager.protocol = protocol
+        if kind == "replay":
+            source = ReplaySource(path, speed=speed or None, rate_hz=rate)
+        else:
+            source = SyntheticSource(rate_hz=rate, protocol=protocol)
+
+        if kind == "loopback":
+            self.loopback = PtyLoopback(source).start()
+            self.serial_manager.connect(self.loopback.port, int(self.comboBox.currentText()))
+        else:
+            self.serial_manager.connect_source(source)
+
+        self.CONNECT.setChecked(True)
+        self.CONNECT.setText("DISCONNECT")
+        for box in (self.comboBox1, self.comboBox, self.protocolBox):
+            box.setEnabled(False)
+
+    def log_data(self, packets):
+        print(f"Received: {packets[-1].raw}")
 
 
 if __name__ == "__main__":
+    import argparse
     import sys
-    app = QtWidgets.QApplication(sys.argv)
+
+    parser = argparse.ArgumentParser(description="NAVIGATOR ground station")
+    parser.add_argument("--source", choices=["synthetic", "replay", "loopback"],
+                        help="run without a radio attached")
+    parser.add_argument("--rate", type=float, default=20.0, help="packets per second")
+    parser.add_argument("--file", help="saved session CSV or raw capture to replay")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier, 0 for max")
+    parser.add_argument("--protocol", choices=["csv", "binary"], default="csv")
+    args, qt_args = parser.parse_known_args()
+    if args.source == "replay" and not args.file:
+        parser.error("--source replay needs --file")
+
+    register_tile_scheme()  # before the QApplication exists
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
     MainWindow = QtWidgets.QMainWindow()
     ui = Ui_MainWindow()
     ui.setupUi(MainWindow)
     MainWindow.show()
+    if args.source:
+        ui.connect_test_source(args.source, args.rate, args.file, args.speed, args.protocol)
     sys.exit(app.exec_())
@@ -0,0 +1,193 @@
+# protocol.py
+"""
+Binary downlink: each packet is the fields of telemetry.TELEMETRY_FIELDS
+packed little-endian per BINARY_LAYOUT, followed by a CRC-16/CCITT of the
+payload, COBS-encoded and terminated by a 0x00 byte.
+"""
+import binascii
+import math
+import struct
+
+from telemetry import FIELD_INDEX, FIELD_NAMES, TelemetryPacket
+
+
+FLIGHT_STATES = ("LAUNCH_PAD", "ASCENT", "APOGEE", "DESCENT", "PROBE_RELEASE", "LANDED")
+
+# (field, struct code, scale). Scaled fields travel as fixed-point integers:
+# value = raw * scale, rounded to the scale's decimal places.
+BINARY_LAYOUT = (
+    ("Team ID", "8s", None),
+    ("Timestamp", "I", None),
+    ("Packet Count", "I", None),
+    ("Altitude", "i", 0.01),
+    ("Pressure", "I", 1.0),
+    ("Temperature", "h", 0.01),
+    ("Voltage", "H", 0.001),
+    ("GNSS Time", "I", None),        # seconds since midnight UTC
+    ("GNSS Latitude", "i", 1e-7),
+    ("GNSS Longitude", "i", 1e-7),
+    ("GNSS Altitude", "i", 0.01),
+    ("GNSS Satellites", "B", None),
+    ("Accel X", "h", 0.01),
+    ("Accel Y", "h", 0.01),
+    ("Accel Z", "h", 0.01),
+    ("Gyro X", "h", 0.1),
+    ("Gyro Y", "h", 0.1),
+    ("Gyro Z", "h", 0.1),
+    ("Flight State", "B", None),     # index into FLIGHT_STATES
+)
+assert tuple(name for name, _, _ in BINARY_LAYOUT) == FIELD_NAMES, "binary layout out of sync with schema"
+
+PAYLOAD = struct.Struct("<" + "".join(code for _, code, _ in BINARY_LAYOUT))
+CRC = struct.Struct("<H")
+FRAME_DELIMITER = b"\x00"
+
+_TEAM_ID = FIELD_INDEX["Team ID"]
+_GNSS_TIME = FIELD_INDEX["GNSS Time"]
+_FLIGHT_STATE = FIELD_INDEX["Flight State"]
+_SCALED = tuple(
+    (i, scale, max(0, round(-math.log10(scale))))
+    for i, (_, _, scale) in enumerate(BINARY_LAYOUT) if scale is not None
+)
+
+
+def crc16(data):
+    """CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF) of a bytes-like object."""
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def cobs_encode(data):
+    out = bytearray(1)
+    code_index = 0
+    code = 1
+    for byte in data:
+        if byte:
+            out.append(byte)
+            code += 1
+        if not byte or code == 0xFF:
+            out[code_index] = code
+            code_index = len(out)
+            out.append(0)
+            code = 1
+    out[code_index] = code
+    return bytes(out)
+
+
+def cobs_decode_into(frame, out):
+    """
+    Decode one COBS frame (without its delimiter) into the bytearray out and
+    return the decoded length. Blocks are copied with slice assignment, so
+    the cost is per block rather than per byte.
+    """
+    n = len(frame)
+    i = 0
+    o = 0
+    while i < n:
+        code = frame[i]
+        end = i + code
+        if code == 0 or end > n:
+            raise ValueError("corrupt COBS frame")
+        size = code - 1
+        out[o:o + size] = frame[i + 1:end]
+        o += size
+        i = end
+        if code != 0xFF and i < n:
+            out[o] = 0
+            o += 1
+    return o
+
+
+def _gnss_time_to_seconds(text):
+    h, m, s = (int(part) for part in text.split(":"))
+    return h * 3600 + m * 60 + s
+
+
+def _seconds_to_gnss_time(seconds):
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def encode_packet(packet):
+    """Encode a TelemetryPacket as one delimited binary frame."""
+    fields = []
+    for (name, code, scale), value in zip(BINARY_LAYOUT, packet.values):
+        if name == "Team ID":
+            value = (value or "").encode("ascii")
+        elif name == "GNSS Time":
+            value = _gnss_time_to_seconds(value) if value else 0
+        elif name == "Flight State":
+            value = FLIGHT_STATES.index(value) if value in FLIGHT_STATES else 0
+        elif scale is not None:
+            value = round((value or 0.0) / scale)
+        elif value is None:
+            value = 0
+        fields.append(value)
+    payload = PAYLOAD.pack(*fields)
+    return cobs_encode(payload + CRC.pack(crc16(payload))) + FRAME_DELIMITER
+
+
+class FrameDecoder:
+    """Split COBS frames out of a receive buffer and decode them to packets."""
+
+    def __init__(self):
+        self._scratch = bytearray(PAYLOAD.size + CRC.size + 256)
+        self._scratch_view = memoryview(self._scratch)
+        self.frames = 0
+        self.crc_errors = 0
+        self.framing_errors = 0
+
+    def feed(self, buf, out, rx_time, raw_out=None):
+        """
+        Decode every complete frame in buf into out; keep the partial tail in buf.
+        If raw_out is a list, the undecoded frames are copied into it as well.
+        """
+        start = 0
+        with memoryview(buf) as view:
+            while True:
+                end = buf.find(FRAME_DELIMITER, start)
+                if end < 0:
+                    break
+                if end > start:
+                    if raw_out is not None:
+                        raw_out.append(bytes(view[start:end]))
+                    packet = self.decode_frame(view[start:end], rx_time)
+                    if packet is not None:
+                        out.append(packet)
+                start = end + 1
+        if start:
+            del buf[:start]
+
+    def decode_frame(self, frame, rx_time):
+        expected = PAYLOAD.size + CRC.size
+        if len(frame) > len(self._scratch):
+            self.framing_errors += 1
+            return None
+        try:
+            length = cobs_decode_into(frame, self._scratch)
+        except ValueError:
+            self.framing_errors += 1
+            return None
+        if length != expected:
+            self.framing_errors += 1
+            return None
+
+        scratch = self._scratch_view
+        if crc16(scratch[:PAYLOAD.size]) != CRC.unpack_from(scratch, PAYLOAD.size)[0]:
+            self.crc_errors += 1
+            return None
+
+        self.frames += 1
+        values = list(PAYLOAD.unpack_from(scratch))
+        values[_TEAM_ID] = values[_TEAM_ID].rstrip(b"\x00").decode("ascii", errors="ignore")
+        values[_GNSS_TIME] = _seconds_to_gnss_time(values[_GNSS_TIME])
+        for i, scale, digits in _SCALED:
+            values[i] = round(values[i] * scale, digits)
+        state = values[_FLIGHT_STATE]
+        values[_FLIGHT_STATE] = FLIGHT_STATES[state] if state < len(FLIGHT_STATES) else None
+        return TelemetryPacket(tuple(values), None, rx_time, len(values))
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "crc_errors": self.crc_errors,
+            "framing_errors": self.framing_errors,
+        }
@@ -0,0 +1,89 @@
+# render.py
+import time
+
+from PyQt5.QtCore import QObject, QTimer, Qt
+
+
+class RenderTarget:
+    """One page's render callback, its dirty flag and rate limit."""
+    __slots__ = ("widget", "render", "name", "min_interval", "dirty", "last_render", "renders")
+
+    def __init__(self, widget, render, name, max_fps=None):
+        self.widget = widget
+        self.render = render
+        self.name = name
+        self.min_interval = 0.0
+        self.dirty = True  # draw once when first shown
+        self.last_render = 0.0
+        self.renders = 0
+        self.set_max_fps(max_fps)
+
+    def set_max_fps(self, max_fps):
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+
+    def mark_dirty(self):
+        self.dirty = True
+
+
+class RenderScheduler(QObject):
+    """
+    App-wide frame clock for the pages.
+
+    Ingest callbacks only update page state and mark their target dirty.
+    Once per tick the scheduler renders the targets that are dirty, due
+    (max_fps) and on screen. A hidden page stays dirty and is drawn once,
+    from its latest state, on the first tick after it is shown, so GUI
+    work follows what is visible rather than the packet rate.
+    """
+
+    def __init__(self, interval_ms=16, parent=None):
+        super().__init__(parent)
+        self.targets = []
+        self.frames = 0
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.tick)
+
+    def register(self, widget, render, max_fps=None, name=None):
+        target = RenderTarget(widget, render, name or f"{type(widget).__name__}.{render.__name__}", max_fps)
+        self.targets = self.targets + [target]
+        if not self.timer.isActive():
+            self.timer.start()
+        return target
+
+    def unregister(self, target):
+        self.targets = [t for t in self.targets if t is not target]
+
+    def tick(self):
+        self.frames += 1
+        now = time.monotonic()
+        for target in self.targets:
+            if not target.dirty or now - target.last_render < target.min_interval:
+                continue
+            if not target.widget.isVisible():
+                continue
+            target.dirty = False
+            target.last_render = now
+            target.renders += 1
+            try:
+                target.render()
+            except Exception as e:
+                print(f"[RenderScheduler] {target.name} render error: {e}")
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "renders": {target.name: target.renders for target in self.targets},
+            "dirty": [target.name for target in self.targets if target.dirty],
+        }
+
+
+# Singleton instance
+_render_scheduler_instance = None
+
+def get_render_scheduler():
+    global _render_scheduler_instance
+    if _render_scheduler_instance is None:
+        _render_scheduler_instance = RenderScheduler()
+    return _render_scheduler_instance
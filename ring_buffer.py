@@ -0,0 +1,58 @@
+# ring_buffer.py
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-capacity (x, y) history backed by preallocated NumPy arrays.
+
+    Every sample is written twice, capacity apart, so the newest
+    `capacity` points are always one contiguous slice: view() hands out
+    array views without copying or reallocating.
+    """
+
+    def __init__(self, capacity, dtype=np.float64):
+        self.capacity = int(capacity)
+        self.dtype = dtype
+        self._x = np.zeros(2 * self.capacity, dtype=dtype)
+        self._y = np.zeros(2 * self.capacity, dtype=dtype)
+        self._head = 0    # next write slot, 0 <= head < capacity
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def extend(self, x, y):
+        """Append matching x and y arrays; only the last `capacity` are kept."""
+        x = np.asarray(x, dtype=self.dtype)[-self.capacity:]
+        y = np.asarray(y, dtype=self.dtype)[-self.capacity:]
+        n = len(x)
+        if n == 0:
+            return
+        cap = self.capacity
+        first = min(n, cap - self._head)
+        for buf, values in ((self._x, x), (self._y, y)):
+            buf[self._head:self._head + first] = values[:first]
+            buf[self._head + cap:self._head + cap + first] = values[:first]
+            if first < n:
+                buf[:n - first] = values[first:]
+                buf[cap:cap + n - first] = values[first:]
+        self._head = (self._head + n) % cap
+        self._count = min(self._count + n, cap)
+
+    def view(self):
+        """Oldest-to-newest x and y views; valid until the next extend()."""
+        start = self._head + self.capacity - self._count
+        end = start + self._count
+        return self._x[start:end], self._y[start:end]
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+    def resize(self, capacity):
+        """Change the capacity, keeping the newest points that still fit."""
+        x, y = self.view()
+        x, y = x.copy(), y.copy()
+        self.__init__(capacity, self.dtype)
+        self.extend(x, y)
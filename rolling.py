@@ -0,0 +1,86 @@
+# rolling.py
+from collections import deque
+
+import numpy as np
+
+from ring_buffer import RingBuffer
+
+
+class RollingStats:
+    """
+    Mean, std, min, max and RMS over the last `window` samples.
+
+    Each sample costs O(1): running sums give mean, std and RMS, and
+    monotonic deques give min and max (amortized). The sums are rebuilt
+    from the window once per `window` samples so rounding error cannot
+    accumulate over a long flight. The samples themselves are kept in a
+    RingBuffer, x being the sample time, for the spectrum panel.
+    """
+
+    def __init__(self, window=1024):
+        self.window = window
+        self.samples = RingBuffer(window)
+        self.clear()
+
+    def clear(self):
+        self.samples.clear()
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._index = 0             # samples seen so far
+        self._since_rebuild = 0
+        self._min = deque()         # (index, value), values increasing
+        self._max = deque()         # (index, value), values decreasing
+
+    def __len__(self):
+        return len(self.samples)
+
+    def extend(self, t, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        # Values about to fall out of the window, oldest first
+        _, current = self.samples.view()
+        overflow = len(current) + len(values) - self.window
+        if overflow > 0:
+            evicted = np.concatenate((current, values))[:overflow]
+            self._sum -= evicted.sum()
+            self._sumsq -= np.dot(evicted, evicted)
+        self._sum += values.sum()
+        self._sumsq += np.dot(values, values)
+        self.samples.extend(t, values)
+
+        for value in values.tolist():
+            i = self._index
+            while self._min and self._min[-1][1] >= value:
+                self._min.pop()
+            self._min.append((i, value))
+            while self._max and self._max[-1][1] <= value:
+                self._max.pop()
+            self._max.append((i, value))
+            self._index += 1
+        oldest = self._index - self.window
+        while self._min[0][0] < oldest:
+            self._min.popleft()
+        while self._max[0][0] < oldest:
+            self._max.popleft()
+
+        self._since_rebuild += len(values)
+        if self._since_rebuild >= self.window:
+            _, current = self.samples.view()
+            self._sum = current.sum()
+            self._sumsq = np.dot(current, current)
+            self._since_rebuild = 0
+
+    def stats(self):
+        n = len(self.samples)
+        if not n:
+            return None
+        mean = self._sum / n
+        mean_square = self._sumsq / n
+        return {
+            "mean": mean,
+            "std": max(mean_square - mean * mean, 0.0) ** 0.5,
+            "min": self._min[0][1],
+            "max": self._max[0][1],
+            "rms": max(mean_square, 0.0) ** 0.5,
+        }
@@ -1,19 +1,70 @@
 import serial
 import serial.tools.list_ports
-from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+import os
 import threading
+import time
+
+from accounting import PacketAccounting
+from derived import DerivedEngine
+from ingest import IngestQueue, KEEP_LATEST
+from journal import CaptureJournal
+from protocol import FrameDecoder
+from store import TelemetryStore
+from telemetry import decode_line
 
 
 class SerialManager(QObject):
     
     data_received = pyqtSignal(str)
+    data_received_batch = pyqtSignal(list)
+
+    # "line": one readline() per packet, one data_received per line.
+    # "block": drain in_waiting in one read, emit data_received_batch once per tick.
+    READ_MODES = ("line", "block")
+
+    # "csv": UTF-8 lines. "binary": COBS frames with a CRC16 trailer (see protocol.py),
+    # which is always read in block mode.
+    PROTOCOLS = ("csv", "binary")
 
-    def __init__(self):
+    def __init__(self, read_mode="line", batch_interval=0.016, dispatch_interval_ms=16, protocol="csv"):
         super().__init__()
+        if read_mode not in self.READ_MODES:
+            raise ValueError(f"Unknown read mode: {read_mode}")
+        if protocol not in self.PROTOCOLS:
+            raise ValueError(f"Unknown protocol: {protocol}")
         self.serial_connection = None
         self.reading_thread = None
         self.running = False
 
+        self.read_mode = read_mode
+        self.batch_interval = batch_interval  # seconds, ~one UI frame
+        self.max_frame_length = 4096
+        self._rx_buffer = bytearray()
+        self.protocol = protocol
+        self.frame_decoder = FrameDecoder()
+
+        # Every decoded packet, appended on the reader thread; shared by all pages
+        self.store = TelemetryStore()
+        # Vertical speed, filtered IMU etc., computed here so every page shares them
+        self.derived = DerivedEngine()
+        # Loss / duplicate / reorder / jitter counters over Packet Count
+        self.accounting = PacketAccounting()
+
+        # Raw capture journal, driven by the LOGGING / DELOGGING controls
+        self.capture_dir = os.path.join(os.path.expanduser("~"), "navigator_captures")
+        self.fsync_interval = 1.0
+        self.journal = None
+        self.logging_enabled = False
+        self.delogging_enabled = False
+
+        # Bounded per-consumer queues, drained on the GUI thread by dispatch_timer.
+        # The list is replaced, never mutated, so the reader thread can iterate it.
+        self._subscribers = []
+        self.dispatch_timer = QTimer(self)
+        self.dispatch_timer.setInterval(dispatch_interval_ms)
+        self.dispatch_timer.timeout.connect(self.dispatch)
+
     @staticmethod
     def scan_usb_devices():
         """
@@ -27,11 +78,39 @@ class SerialManager(QObject):
         if self.serial_connection and self.serial_connection.is_open:
             self.disconnect()
 
-        self.serial_connection = serial.Serial(port, baudrate, timeout=1)
+        # Block mode must wake up at least once per tick to flush pending lines
+        timeout = self.batch_interval if self.block_reads else 1
+        self.serial_connection = serial.Serial(port, baudrate, timeout=timeout)
         self.running = True
         self.start_reading_thread()
         print(f"✅ Connected to {port} at {baudrate} baud")
 
+    def connect_source(self, source):
+        """Read from a serial-like source (see sources.py) instead of a port."""
+        if self.serial_connection and self.serial_connection.is_open:
+            self.disconnect()
+
+        source.timeout = self.batch_interval if self.block_reads else 1
+        if not source.is_open:
+            source.open()
+        self.serial_connection = source
+        self.running = True
+        self.start_reading_thread()
+        print(f"✅ Connected to {type(source).__name__}")
+
+    def set_logging_state(self, logging, delogging=False):
+        """LOGGING opens a new capture session in capture_dir, DELOGGING closes it."""
+        self.logging_enabled = logging
+        self.delogging_enabled = delogging
+        if logging and self.journal is None:
+            session = os.path.join(self.capture_dir, time.strftime("session-%Y%m%d-%H%M%S"))
+            self.journal = CaptureJournal(session, self.protocol, fsync_interval=self.fsync_interval).start()
+            print(f"📝 Recording raw frames to {session}")
+        elif not logging and self.journal is not None:
+            journal, self.journal = self.journal, None
+            journal.close()
+            print(f"📝 Recording stopped ({journal.records} frames)")
+
     def disconnect(self):
         """Disconnect from the serial port."""
         self.running = False
@@ -41,7 +120,12 @@ class SerialManager(QObject):
 
     def start_reading_thread(self):
         """Start a background thread to read serial data."""
-        self.reading_thread = threading.Thread(target=self.read_serial_data, daemon=True)
+        target = self.read_serial_blocks if self.block_reads else self.read_serial_data
+        self.derived.reset()  # filters restart with the new stream
+        if self.journal:
+            # LOGGING may have been pressed before the protocol was chosen
+            self.journal.set_protocol(self.protocol)
+        self.reading_thread = threading.Thread(target=target, daemon=True)
         self.reading_thread.start()
 
     def read_serial_data(self):
@@ -50,6 +134,9 @@ class SerialManager(QObject):
             while self.running and self.serial_connection.is_open:
                 raw = self.serial_connection.readline()
                 if raw:
+                    journal = self.journal
+                    if journal:
+                        journal.append(raw.rstrip(b"\r\n"), time.monotonic())
                     print(f"RAW BYTES: {raw}")  
                     try:
                         line = raw.decode("utf-8", errors="ignore").strip()
@@ -63,10 +150,139 @@ class SerialManager(QObject):
         except Exception as e:
             print(f"Serial Read Error: {str(e)}")
 
+    @property
+    def block_reads(self):
+        return self.read_mode == "block" or self.protocol == "binary"
+
+    def read_serial_blocks(self):
+        """Read everything waiting in one call and emit complete frames in batches."""
+        binary = self.protocol == "binary"
+        flush = self.on_packets_received if binary else self.on_batch_received
+        buf = self._rx_buffer
+        del buf[:]
+        pending = []
+        raw_frames = []
+        last_emit = time.monotonic()
+        try:
+            while self.running and self.serial_connection.is_open:
+                conn = self.serial_connection
+                chunk = conn.read(conn.in_waiting or 1)
+                if chunk:
+                    rx_time = time.monotonic()
+                    journal = self.journal
+                    raw_out = raw_frames if journal else None
+                    buf += chunk
+                    if binary:
+                        self.frame_decoder.feed(buf, pending, rx_time, raw_out)
+                    else:
+                        self.split_lines(buf, pending, raw_out, rx_time)
+                    if raw_frames:
+                        for frame in raw_frames:
+                            journal.append(frame, rx_time)
+                        raw_frames.clear()
+                    if len(buf) > self.max_frame_length:
+                        # No delimiter in sight, this is noise
+                        print(f"⚠️ Dropping {len(buf)} bytes without frame delimiter")
+                        del buf[:]
+
+                now = time.monotonic()
+                if pending and now - last_emit >= self.batch_interval:
+                    flush(pending)
+                    pending = []
+                    last_emit = now
+        except Exception as e:
+            if self.running:
+                print(f"Serial Read Error: {str(e)}")
+        if pending:
+            flush(pending)
+
+    @staticmethod
+    def split_lines(buf, out, raw_out=None, rx_time=None):
+        """
+        Move every complete line in buf to out, keeping the partial tail in buf.
+        If raw_out is a list, the undecoded lines are copied into it as well.
+        With rx_time, out gets (line, rx_time) pairs: the time the bytes that
+        completed the line were read, not the time the batch is flushed.
+        """
+        start = 0
+        while True:
+            end = buf.find(b"\n", start)
+            if end < 0:
+                break
+            if raw_out is not None:
+                raw_out.append(bytes(buf[start:end]).rstrip(b"\r"))  # as read_serial_data journals it
+            line = buf[start:end].decode("utf-8", errors="ignore").strip()
+            if line:
+                out.append(line if rx_time is None else (line, rx_time))
+            start = end + 1
+        if start:
+            del buf[:start]
+
     def on_data_received(self, data):
         
+        packet = decode_line(data)
+        self.publish((packet,))
         self.data_received.emit(data)
 
+    def on_batch_received(self, stamped):
+        """stamped: (line, rx_time) pairs from split_lines."""
+        lines = [line for line, _ in stamped]
+        self.on_packets_received([decode_line(line, rx_time) for line, rx_time in stamped], lines)
+
+    def on_packets_received(self, packets, lines=None):
+        self.publish(packets)
+        # Legacy per-line signals; skipped when nobody listens so binary
+        # packets are never formatted back to text for nothing.
+        if self.receivers(self.data_received):
+            for packet in packets:
+                self.data_received.emit(packet.raw)
+        if self.receivers(self.data_received_batch):
+            self.data_received_batch.emit(lines or [packet.raw for packet in packets])
+
+    def subscribe(self, callback, policy=KEEP_LATEST, maxlen=None, name=None):
+        """
+        Deliver packets to callback(list_of_packets) on the GUI thread, at most
+        once per dispatch tick, through a bounded queue with the given policy.
+        maxlen defaults per policy (ingest.py); KEEP_ALL is capped too.
+        Returns the IngestQueue so the caller can read its counters.
+        """
+        queue = IngestQueue(name or getattr(callback, "__qualname__", repr(callback)), policy, maxlen)
+        self._subscribers = self._subscribers + [(queue, callback)]
+        if not self.dispatch_timer.isActive():
+            self.dispatch_timer.start()
+        return queue
+
+    def unsubscribe(self, callback):
+        self._subscribers = [(q, cb) for q, cb in self._subscribers if cb != callback]
+
+    def publish(self, packets):
+        """Called on the reader thread; never blocks on a slow consumer."""
+        derived = self.derived.process(packets)
+        self.store.append(packets, derived)
+        self.accounting.add_packets(packets)
+        for queue, _ in self._subscribers:
+            queue.put_many(packets)
+
+    def dispatch(self):
+        for queue, callback in self._subscribers:
+            packets = queue.drain()
+            if packets:
+                try:
+                    callback(packets)
+                except Exception as e:
+                    print(f"[SerialManager] {queue.name} dispatch error: {e}")
+
+    def packet_stats(self):
+        """Packet accounting plus frames the decoder rejected, for any page to show."""
+        stats = self.accounting.stats()
+        decoder = self.frame_decoder.stats()
+        stats["corrupt"] += decoder["crc_errors"] + decoder["framing_errors"]
+        return stats
+
+    def ingest_stats(self):
+        """Depth, dropped and coalesced counters for every subscriber queue."""
+        return {queue.name: queue.stats() for queue, _ in self._subscribers}
+
 
 # Singleton instance
 _serial_manager_instance = None
@@ -0,0 +1,266 @@
+# sources.py
+"""
+Telemetry sources that stand in for serial.Serial.
+
+Each source exposes the subset of the pySerial API that SerialManager's
+reader uses (is_open, in_waiting, read, readline, close), so replayed and
+synthetic data go through exactly the same reader, decoder and ingest
+queues as a real radio. PtyLoopback goes one step further and feeds a
+source through a pseudo-terminal, so a real serial.Serial reads it.
+"""
+import csv
+import math
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from journal import JournalReader
+from protocol import encode_packet
+from telemetry import FIELD_NAMES, TelemetryPacket
+
+
+class TelemetrySource(ABC):
+    """Serial-like byte stream filled by a producer thread."""
+
+    max_buffered = 1 << 20  # producer waits once this much is unread
+
+    def __init__(self, timeout=1.0):
+        self.timeout = timeout
+        self.is_open = False
+        self._buffer = bytearray()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def open(self):
+        self.is_open = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        with self._cond:
+            self.is_open = False
+            self._cond.notify_all()
+
+    def _run(self):
+        try:
+            self.produce()
+        except Exception as e:
+            print(f"[{type(self).__name__}] Source error: {e}")
+
+    @abstractmethod
+    def produce(self):
+        """Subclasses call self.write() until done or closed."""
+
+    # --- producer side ---
+
+    def write(self, data):
+        with self._cond:
+            while self.is_open and len(self._buffer) > self.max_buffered:
+                self._cond.wait(0.1)
+            self._buffer += data
+            self._cond.notify_all()
+
+    def sleep_until(self, deadline):
+        """Sleep until a monotonic deadline; False once the source is closed."""
+        with self._cond:
+            while self.is_open:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return True
+                self._cond.wait(remaining)
+        return False
+
+    # --- serial.Serial side ---
+
+    @property
+    def in_waiting(self):
+        return len(self._buffer)
+
+    def read(self, size=1):
+        with self._cond:
+            self._cond.wait_for(lambda: len(self._buffer) >= size or not self.is_open, self.timeout)
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+            self._cond.notify_all()
+        return data
+
+    def readline(self):
+        with self._cond:
+            self._cond.wait_for(lambda: b"\n" in self._buffer or not self.is_open, self.timeout)
+            end = self._buffer.find(b"\n") + 1 or len(self._buffer)
+            data = bytes(self._buffer[:end])
+            del self._buffer[:end]
+            self._cond.notify_all()
+        return data
+
+
+class ReplaySource(TelemetrySource):
+    """
+    Replay a saved session: the CSV written by the dashboard's "Save Data to
+    CSV" (header row skipped), a raw capture of the downlink, or a capture
+    journal directory. Journal records keep their recorded timing; other
+    frames are paced at rate_hz. speed scales either; speed=None replays as
+    fast as the reader takes them.
+    """
+
+    def __init__(self, path, speed=1.0, rate_hz=20.0, delimiter=b"\n", loop=False, timeout=1.0):
+        super().__init__(timeout)
+        self.path = path
+        self.speed = speed
+        self.rate_hz = rate_hz
+        self.delimiter = delimiter
+        self.loop = loop
+
+    def frames(self):
+        with open(self.path, "rb") as f:
+            head = f.read(len(FIELD_NAMES[0]) + 1)
+            f.seek(0)
+            if head.lstrip(b'"').startswith(FIELD_NAMES[0].encode()):
+                # Dashboard export: re-emit each row as a downlink line
+                rows = csv.reader(line.decode("utf-8", errors="ignore") for line in f)
+                next(rows, None)
+                for row in rows:
+                    yield ",".join(row).encode() + b"\n"
+            else:
+                tail = b""
+                for chunk in iter(lambda: f.read(1 << 16), b""):
+                    *complete, tail = (tail + chunk).split(self.delimiter)
+                    for frame in complete:
+                        yield frame + self.delimiter
+                if tail:
+                    yield tail + self.delimiter
+
+    def journal_frames(self):
+        return JournalReader(self.path).delimited()
+
+    def produce(self):
+        while True:
+            start = time.monotonic()
+            if os.path.isdir(self.path):
+                timed = self.journal_frames()
+            else:
+                timed = ((n / self.rate_hz, frame) for n, frame in enumerate(self.frames()))
+            first = None
+            for offset, frame in timed:
+                first = offset if first is None else first
+                if self.speed and not self.sleep_until(start + (offset - first) / self.speed):
+                    return
+                if not self.is_open:
+                    return
+                self.write(frame)
+            if not self.loop:
+                return
+
+
+def default_profile():
+    """A plausible ascent / descent: field name -> f(t) over seconds since start."""
+    def altitude(t):
+        return max(0.0, 500.0 * math.sin(math.pi * min(t, 120.0) / 120.0))
+
+    def flight_state(t):
+        if t < 2:
+            return "LAUNCH_PAD"
+        return "ASCENT" if t < 60 else "DESCENT" if t < 120 else "LANDED"
+
+    return {
+        "Team ID": lambda t: "TEAM123",
+        "Altitude": altitude,
+        "Pressure": lambda t: 101325.0 * (1 - 2.25577e-5 * altitude(t)) ** 5.25588,
+        "Temperature": lambda t: 28.0 - 0.0065 * altitude(t) + random.gauss(0, 0.05),
+        "Voltage": lambda t: 3.3 - t * 1e-4,
+        "GNSS Time": lambda t: time.strftime("%H:%M:%S", time.gmtime(t)),
+        "GNSS Latitude": lambda t: 23.123456 + t * 2e-6,
+        "GNSS Longitude": lambda t: 72.987654 + t * 3e-6,
+        "GNSS Altitude": lambda t: altitude(t) + random.gauss(0, 1.5),
+        "GNSS Satellites": lambda t: 9,
+        "Accel X": lambda t: random.gauss(0, 0.3),
+        "Accel Y": lambda t: random.gauss(0, 0.3),
+        "Accel Z": lambda t: 9.81 + random.gauss(0, 0.3),
+        "Gyro X": lambda t: 5 * math.sin(t) + random.gauss(0, 0.5),
+        "Gyro Y": lambda t: 5 * math.cos(t) + random.gauss(0, 0.5),
+        "Gyro Z": lambda t: 30.0 + random.gauss(0, 0.5),
+        "Flight State": flight_state,
+    }
+
+
+class SyntheticSource(TelemetrySource):
+    """
+    Generate packets at rate_hz from a field profile (see default_profile).
+    Packets due since the last wake-up are written in one chunk, so high
+    rates don't need a sleep per packet.
+    """
+
+    def __init__(self, rate_hz=20.0, profile=None, protocol="csv", tick=0.01, timeout=1.0):
+        super().__init__(timeout)
+        self.rate_hz = rate_hz
+        self.profile = profile or default_profile()
+        self.protocol = protocol
+        self.tick = tick
+
+    def make_packet(self, n, t):
+        values = [int(t) if name == "Timestamp" else
+                  n if name == "Packet Count" else
+                  self.profile[name](t) if name in self.profile else None
+                  for name in FIELD_NAMES]
+        values = [round(v, 6) if isinstance(v, float) else v for v in values]
+        return TelemetryPacket(tuple(values))
+
+    def produce(self):
+        start = time.monotonic()
+        sent = 0
+        while self.is_open:
+            due = int((time.monotonic() - start) * self.rate_hz)
+            if due > sent:
+                packets = (self.make_packet(n, n / self.rate_hz) for n in range(sent, due))
+                if self.protocol == "binary":
+                    self.write(b"".join(encode_packet(p) for p in packets))
+                else:
+                    self.write("".join(p.raw + "\n" for p in packets).encode())
+                sent = due
+            if not self.sleep_until(time.monotonic() + self.tick):
+                return
+
+
+class PtyLoopback:
+    """
+    Pump a source through a pseudo-terminal (Linux/macOS) so the real
+    serial.Serial path can open `port` as if a radio were attached.
+    """
+
+    def __init__(self, source):
+        import pty
+        import tty
+
+        self.source = source
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.master)
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.source.open()
+        threading.Thread(target=self._pump, daemon=True).start()
+        return self
+
+    def _pump(self):
+        try:
+            while self.running and self.source.is_open:
+                data = self.source.read(self.source.in_waiting or 1)
+                if data:
+                    os.write(self.master, data)
+        except OSError as e:
+            print(f"[PtyLoopback] Write error: {e}")
+
+    def close(self):
+        self.running = False
+        self.source.close()
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
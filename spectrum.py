@@ -0,0 +1,99 @@
+# spectrum.py
+import inspect
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout
+import numpy as np
+import pyqtgraph as pg
+
+
+# numpy >= 2.0 can write the FFT into a preallocated array
+_RFFT_OUT = "out" in inspect.signature(np.fft.rfft).parameters
+
+
+class WelchPSD:
+    """
+    Welch power spectral density over the last `size` samples.
+
+    Hann-windowed segments of `segment` samples with 50% overlap. All work
+    arrays are allocated once here; compute() only writes into them.
+    """
+
+    def __init__(self, size=512, segment=128):
+        self.size = size
+        self.segment = segment
+        step = segment // 2
+        self.starts = np.arange(0, size - segment + 1, step)
+        self.window = np.hanning(segment)
+        self.scale = 1.0 / (self.window ** 2).sum()
+
+        self._frames = np.empty((len(self.starts), segment))
+        self._spectrum = np.empty((len(self.starts), segment // 2 + 1), dtype=np.complex128)
+        self._power = np.empty((len(self.starts), segment // 2 + 1))
+        self.psd = np.zeros(segment // 2 + 1)
+        self._unit_freqs = np.fft.rfftfreq(segment)  # cycles per sample
+        self.freqs = self._unit_freqs.copy()
+
+    def compute(self, values, fs):
+        """PSD of the newest `size` values (needs at least that many) at sample rate fs."""
+        values = values[-self.size:]
+        mean = values.mean()
+        for row, start in enumerate(self.starts):
+            np.subtract(values[start:start + self.segment], mean, out=self._frames[row])
+        np.multiply(self._frames, self.window, out=self._frames)
+        if _RFFT_OUT:
+            np.fft.rfft(self._frames, axis=1, out=self._spectrum)
+        else:
+            self._spectrum[:] = np.fft.rfft(self._frames, axis=1)
+        np.abs(self._spectrum, out=self._power)
+        np.square(self._power, out=self._power)
+        np.mean(self._power, axis=0, out=self.psd)
+        # One-sided density: double everything but DC (and Nyquist)
+        self.psd *= 2.0 * self.scale / fs
+        self.psd[0] /= 2.0
+        if self.segment % 2 == 0:
+            self.psd[-1] /= 2.0
+        np.multiply(self._unit_freqs, fs, out=self.freqs)
+        # Floor at a tiny value so the log-scale plot never sees zeros
+        np.maximum(self.psd, 1e-12, out=self.psd)
+        return self.freqs, self.psd
+
+
+class SpectrumPanel(QWidget):
+    """Live PSD of the IMU channels, recomputed by refresh() on a throttled timer."""
+
+    COLORS = ['r', 'g', 'b', 'y', 'c', 'm']
+
+    def __init__(self, channels, size=512, segment=128, parent=None):
+        super().__init__(parent)
+        self.channels = list(channels)
+        self.size = size
+        self.welch = {channel: WelchPSD(size, segment) for channel in self.channels}
+
+        self.plot_widget = pg.PlotWidget(title=f"Spectrum (last {size} samples)")
+        self.plot_widget.showGrid(x=True, y=True)
+        self.plot_widget.setLogMode(y=True)
+        self.plot_widget.setLabel("bottom", "Frequency", units="Hz")
+        self.plot_widget.addLegend(offset=(10, 10))
+        self.curves = {
+            channel: self.plot_widget.plot([], [], pen=pg.mkPen(self.COLORS[i % len(self.COLORS)], width=1),
+                                           name=channel)
+            for i, channel in enumerate(self.channels)
+        }
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.plot_widget)
+
+    def refresh(self, samples):
+        """samples: channel -> RingBuffer of (time, value); channels short of `size` are skipped."""
+        for channel in self.channels:
+            buffer = samples.get(channel)
+            if buffer is None or len(buffer) < self.size:
+                continue
+            t, values = buffer.view()
+            span = t[-1] - t[-self.size]
+            if span <= 0:
+                continue
+            fs = (self.size - 1) / span
+            freqs, psd = self.welch[channel].compute(values, fs)
+            self.curves[channel].setData(freqs[1:], psd[1:])  # skip DC
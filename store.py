@@ -0,0 +1,222 @@
+# store.py
+"""
+Columnar telemetry store.
+
+Rows are packed into fixed-size chunks holding one typed NumPy array per
+field. Full chunks beyond the memory cap are spilled to disk by a
+background thread and read back from their file when a query needs
+them, so resident memory stays flat however long the session runs and
+spilled chunks hold no open files. Appends happen on the serial
+reader thread; queries return copies and are safe from any thread.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+
+import numpy as np
+
+from derived import DERIVED_NAMES
+from telemetry import FIELD_NAMES, TELEMETRY_FIELDS
+
+
+INT_MISSING = -1
+STRING_WIDTH = 16
+
+_DTYPES = {"int": np.dtype(np.int64), "float": np.dtype(np.float64), "string": np.dtype(f"S{STRING_WIDTH}")}
+
+# Receive time first, then the downlink fields in wire order, then derived channels
+COLUMNS = (
+    (("rx_time", np.dtype(np.float64)),)
+    + tuple((f.name, _DTYPES[f.kind]) for f in TELEMETRY_FIELDS)
+    + tuple((name, np.dtype(np.float64)) for name in DERIVED_NAMES)
+)
+
+
+class _Chunk:
+    __slots__ = ("columns", "length", "path", "last_time")
+
+    def __init__(self, columns, length=0, path=None):
+        self.columns = columns  # name -> array while resident, None once spilled
+        self.length = length
+        self.path = path
+        self.last_time = None  # rx_time of the last row, kept when spilled
+
+
+class TelemetryStore:
+    def __init__(self, chunk_size=4096, max_memory_bytes=64 << 20, spill_dir=None):
+        self.chunk_size = chunk_size
+        self.max_memory_bytes = max_memory_bytes
+        self.dtypes = dict(COLUMNS)
+        self.row_bytes = sum(dtype.itemsize for dtype in self.dtypes.values())
+        # Byte offset of each column in a spilled chunk file (columns back to back)
+        self._offsets = {}
+        offset = 0
+        for name, dtype in self.dtypes.items():
+            self._offsets[name] = offset
+            offset += dtype.itemsize * chunk_size
+
+        self._spill_dir = spill_dir or tempfile.mkdtemp(prefix="navigator-store-")
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self._spill_dir, True)
+
+        self._lock = threading.Lock()
+        self._chunks = []
+        self._count = 0
+        self._spilling = False
+        self._spill_count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def memory_bytes(self):
+        resident = sum(1 for chunk in self._chunks if chunk.path is None)
+        return resident * self.chunk_size * self.row_bytes
+
+    @property
+    def spilled_chunks(self):
+        return sum(1 for chunk in self._chunks if chunk.path is not None)
+
+    def _new_chunk(self):
+        return _Chunk({name: np.zeros(self.chunk_size, dtype) for name, dtype in self.dtypes.items()})
+
+    # --- writing ---
+
+    def append(self, packets, derived=None):
+        """
+        Append a batch of TelemetryPackets as rows and stamp each with its row number.
+        derived is the DerivedEngine output for the same batch, name -> array.
+        """
+        if not packets:
+            return
+        columns = dict(zip(FIELD_NAMES, zip(*(packet.values for packet in packets))))
+        columns["rx_time"] = [packet.rx_time for packet in packets]
+        if derived:
+            columns.update(derived)
+        first = self.append_columns(columns, len(packets))
+        for seq, packet in enumerate(packets, first):
+            packet.seq = seq
+
+    def append_columns(self, columns, n):
+        """
+        Append n rows given as name -> sequence; missing columns are left empty.
+        Returns the row number of the first appended row.
+        """
+        converted = {name: self._convert(name, values) for name, values in columns.items()}
+        start = 0
+        with self._lock:
+            first = self._count
+            while start < n:
+                if not self._chunks or self._chunks[-1].length == self.chunk_size:
+                    self._chunks.append(self._new_chunk())
+                chunk = self._chunks[-1]
+                take = min(n - start, self.chunk_size - chunk.length)
+                for name, values in converted.items():
+                    chunk.columns[name][chunk.length:chunk.length + take] = values[start:start + take]
+                chunk.length += take
+                start += take
+            self._count += n
+            spill = not self._spilling and self.memory_bytes > self.max_memory_bytes
+            self._spilling = self._spilling or spill
+        if spill:
+            threading.Thread(target=self._spill_old_chunks, daemon=True).start()
+        return first
+
+    def _convert(self, name, values):
+        dtype = self.dtypes[name]
+        if dtype.kind == "S":
+            return np.array([(v or "").encode("utf-8", "ignore")[:STRING_WIDTH] for v in values], dtype)
+        if dtype.kind == "i":
+            return np.array([INT_MISSING if v is None else v for v in values], dtype)
+        return np.array(values, dtype)  # None becomes NaN
+
+    def _spill_old_chunks(self):
+        try:
+            while self.memory_bytes > self.max_memory_bytes:
+                with self._lock:
+                    # Oldest resident chunk that is full; the active chunk is never spilled
+                    chunk = next((c for c in self._chunks[:-1] if c.path is None), None)
+                if chunk is None:
+                    break
+                self._spill_count += 1
+                path = os.path.join(self._spill_dir, f"chunk-{self._spill_count:06d}.bin")
+                with open(path, "wb") as f:
+                    for name in self.dtypes:
+                        chunk.columns[name].tofile(f)
+                with self._lock:
+                    chunk.last_time = float(chunk.columns["rx_time"][chunk.length - 1])
+                    chunk.columns = None
+                    chunk.path = path
+        except OSError as e:
+            print(f"[TelemetryStore] Spill error: {e}")
+        finally:
+            self._spilling = False
+
+    def clear(self):
+        with self._lock:
+            chunks, self._chunks = self._chunks, []
+            self._count = 0
+        for chunk in chunks:
+            if chunk.path:
+                chunk.columns = None
+                try:
+                    os.remove(chunk.path)
+                except OSError:
+                    pass
+
+    # --- reading ---
+
+    def _read(self, columns, path, fields, lo, hi):
+        """Copies of rows [lo, hi) of a chunk, from memory or from its spill file."""
+        if columns is not None:
+            return {name: np.array(columns[name][lo:hi]) for name in fields}
+        out = {}
+        with open(path, "rb") as f:
+            for name in fields:
+                dtype = self.dtypes[name]
+                f.seek(self._offsets[name] + lo * dtype.itemsize)
+                out[name] = np.fromfile(f, dtype, hi - lo)
+        return out
+
+    def iter_chunks(self, start=0, stop=None, fields=None):
+        """Yield name -> array slices covering rows [start, stop), one chunk at a time."""
+        fields = list(fields or self.dtypes)
+        with self._lock:
+            stop = self._count if stop is None else min(stop, self._count)
+            chunks = [(chunk.columns, chunk.path, chunk.length) for chunk in self._chunks]
+        first = start // self.chunk_size
+        for i in range(first, (stop + self.chunk_size - 1) // self.chunk_size):
+            columns, path, length = chunks[i]
+            lo = max(start - i * self.chunk_size, 0)
+            hi = min(stop - i * self.chunk_size, length)
+            yield self._read(columns, path, fields, lo, hi)
+
+    def rows(self, start=0, stop=None, fields=None):
+        """Rows [start, stop) as name -> array."""
+        fields = list(fields or self.dtypes)
+        parts = list(self.iter_chunks(start, stop, fields))
+        if not parts:
+            return {name: np.empty(0, self.dtypes[name]) for name in fields}
+        return {name: np.concatenate([part[name] for part in parts]) for name in fields}
+
+    def index_at_time(self, rx_time):
+        """Index of the first row received at or after rx_time (monotonic clock)."""
+        with self._lock:
+            chunks = [(chunk.columns, chunk.path, chunk.length, chunk.last_time) for chunk in self._chunks]
+        for i, (columns, path, length, last_time) in enumerate(chunks):
+            if not length:
+                continue
+            if columns is not None:
+                last_time = columns["rx_time"][length - 1]
+            if last_time >= rx_time:
+                times = self._read(columns, path, ["rx_time"], 0, length)["rx_time"]
+                return i * self.chunk_size + int(np.searchsorted(times, rx_time))
+        return self._count
+
+    def rows_between(self, t0, t1, fields=None):
+        """Rows received in [t0, t1)."""
+        return self.rows(self.index_at_time(t0), self.index_at_time(t1), fields)
+
+    def latest(self, n=1, fields=None):
+        return self.rows(max(self._count - n, 0), None, fields)
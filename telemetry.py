@@ -0,0 +1,138 @@
+# telemetry.py
+import time
+
+
+class TelemetryField:
+    """One column of the CSV downlink."""
+    __slots__ = ("name", "kind", "unit")
+
+    def __init__(self, name, kind, unit=""):
+        self.name = name
+        self.kind = kind
+        self.unit = unit
+
+
+# Downlink schema, in wire order. Every page reads fields by these names.
+TELEMETRY_FIELDS = (
+    TelemetryField("Team ID", "string"),
+    TelemetryField("Timestamp", "int", "s"),
+    TelemetryField("Packet Count", "int"),
+    TelemetryField("Altitude", "float", "m"),
+    TelemetryField("Pressure", "float", "Pa"),
+    TelemetryField("Temperature", "float", "°C"),
+    TelemetryField("Voltage", "float", "V"),
+    TelemetryField("GNSS Time", "string", "s"),
+    TelemetryField("GNSS Latitude", "float", "°"),
+    TelemetryField("GNSS Longitude", "float", "°"),
+    TelemetryField("GNSS Altitude", "float", "m"),
+    TelemetryField("GNSS Satellites", "int"),
+    TelemetryField("Accel X", "float", "m/s²"),
+    TelemetryField("Accel Y", "float", "m/s²"),
+    TelemetryField("Accel Z", "float", "m/s²"),
+    TelemetryField("Gyro X", "float", "°/s"),
+    TelemetryField("Gyro Y", "float", "°/s"),
+    TelemetryField("Gyro Z", "float", "°/s"),
+    TelemetryField("Flight State", "string"),
+)
+
+FIELD_NAMES = tuple(f.name for f in TELEMETRY_FIELDS)
+FIELD_INDEX = {f.name: i for i, f in enumerate(TELEMETRY_FIELDS)}
+UNITS = {f.name: f.unit for f in TELEMETRY_FIELDS}
+
+
+def convert_data(data: str, expected_type: str):
+    try:
+        if expected_type == "string":
+            return str(data)
+        elif expected_type == "int":
+            try:
+                return int(data)
+            except ValueError:
+                return int(float(data))
+        elif expected_type == "float":
+            return float(data)
+        elif expected_type == "char":
+            return data[0] if data else ''
+        elif expected_type == "uint8_t":
+            val = int(data)
+            return val if 0 <= val <= 255 else None
+        else:
+            return str(data)
+    except (ValueError, OverflowError):
+        return None
+
+
+_KINDS = tuple(f.kind for f in TELEMETRY_FIELDS)
+
+
+class TelemetryPacket:
+    """
+    A decoded downlink packet. Fields are read by name: packet["Altitude"].
+    Derived channels (derived.py) are read the same way once computed.
+    """
+    __slots__ = ("values", "_raw", "rx_time", "field_count", "seq", "derived")
+
+    def __init__(self, values, raw=None, rx_time=0.0, field_count=None):
+        self.values = values
+        self._raw = raw
+        self.rx_time = rx_time
+        self.field_count = len(values) if field_count is None else field_count
+        self.seq = None  # row number in the TelemetryStore, once stored
+        self.derived = None  # derived channel -> value, set by DerivedEngine
+
+    @property
+    def raw(self):
+        """The CSV line; rebuilt on first use for packets that arrived in binary."""
+        if self._raw is None:
+            self._raw = ",".join("" if v is None else str(v) for v in self.values)
+        return self._raw
+
+    def __getitem__(self, name):
+        index = FIELD_INDEX.get(name)
+        if index is None:
+            if self.derived is None:
+                raise KeyError(name)
+            return self.derived[name]
+        return self.values[index]
+
+    def get(self, name, default=None):
+        index = FIELD_INDEX.get(name)
+        if index is not None:
+            value = self.values[index]
+        elif self.derived is not None:
+            value = self.derived.get(name)
+        else:
+            return default
+        return default if value is None else value
+
+    def to_dict(self):
+        values = dict(zip(FIELD_NAMES, self.values))
+        if self.derived:
+            values.update(self.derived)
+        return values
+
+    def __repr__(self):
+        return f"TelemetryPacket({self.raw!r})"
+
+
+def decode_line(line, rx_time=None):
+    """Decode one CSV line into a TelemetryPacket. Missing or bad fields become None."""
+    parts = line.split(',')
+    values = [None] * len(TELEMETRY_FIELDS)
+    for i, text in enumerate(parts[:len(values)]):
+        text = text.strip()
+        if text:
+            values[i] = convert_data(text, _KINDS[i])
+    return TelemetryPacket(
+        tuple(values), line,
+        time.monotonic() if rx_time is None else rx_time,
+        len(parts),
+    )
+
+
+def format_value(name, value):
+    """Display text for a field value, with its unit."""
+    if value is None:
+        return "N/A"
+    unit = UNITS.get(name, "")
+    return f"{value} {unit}" if unit else str(value)
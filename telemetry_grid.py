@@ -0,0 +1,139 @@
+# telemetry_grid.py
+from PyQt5.QtWidgets import QTableView, QStyledItemDelegate, QHeaderView, QAbstractItemView
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QRectF, QSize, QPointF
+from PyQt5.QtGui import QColor, QFont, QPen, QStaticText, QTextOption
+
+
+FieldRole = Qt.UserRole + 1
+
+_UNSET = object()
+
+
+class TelemetryGridModel(QAbstractTableModel):
+    """
+    Telemetry fields laid out as a card grid. Display text (value plus
+    unit) is formatted once per change and cached; set_values() emits
+    dataChanged only for the cells whose value changed.
+    """
+
+    def __init__(self, fields, units, columns=5, parent=None):
+        super().__init__(parent)
+        self.fields = list(fields)
+        self.columns = columns
+        self.unit_suffix = {key: f" {units[key]}" if units.get(key) else "" for key in self.fields}
+        self.position = {key: divmod(i, columns) for i, key in enumerate(self.fields)}
+        self.shown_values = {}
+        self.text = {key: "N/A" for key in self.fields}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else (len(self.fields) + self.columns - 1) // self.columns
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.columns
+
+    def field_at(self, index):
+        i = index.row() * self.columns + index.column()
+        return self.fields[i] if i < len(self.fields) else None
+
+    def data(self, index, role=Qt.DisplayRole):
+        field = self.field_at(index)
+        if field is None:
+            return None
+        if role == Qt.DisplayRole:
+            return self.text[field]
+        if role == FieldRole:
+            return field
+        return None
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled if self.field_at(index) else Qt.NoItemFlags
+
+    def set_values(self, values):
+        """Update from field -> value; returns the number of cells that changed."""
+        changed_rows = {}
+        for key, value in values.items():
+            if key not in self.text:
+                continue
+            shown = self.shown_values.get(key, _UNSET)
+            if shown == value or (shown != shown and value != value):
+                continue  # unchanged; NaN != NaN, so two NaNs count as equal
+            self.shown_values[key] = value
+            self.text[key] = "N/A" if value is None else f"{value}{self.unit_suffix[key]}"
+            row, col = self.position[key]
+            lo, hi = changed_rows.get(row, (col, col))
+            changed_rows[row] = (min(lo, col), max(hi, col))
+
+        for row, (lo, hi) in changed_rows.items():
+            self.dataChanged.emit(self.index(row, lo), self.index(row, hi), [Qt.DisplayRole])
+        return sum(hi - lo + 1 for lo, hi in changed_rows.values())
+
+
+class TelemetryCardDelegate(QStyledItemDelegate):
+    """Paints one card per cell: bold field label above the value."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.label_font = QFont("Segoe UI", 10, QFont.Bold)
+        self.value_font = QFont("Segoe UI", 11)
+        self.card_brush = QColor("#F5F7F9")
+        self.card_pen = QPen(QColor("#CFD8DC"))
+        self.label_pen = QPen(QColor("#37474F"))
+        self.value_pen = QPen(QColor("#1E88E5"))
+        self.margin = 8
+        self._label_cache = {}
+
+    def _label(self, field, width):
+        key = (field, width)
+        text = self._label_cache.get(key)
+        if text is None:
+            text = QStaticText(field)
+            text.setTextWidth(width)
+            text.setTextOption(QTextOption(Qt.AlignCenter))
+            text.prepare(font=self.label_font)
+            self._label_cache[key] = text
+        return text
+
+    def paint(self, painter, option, index):
+        field = index.data(FieldRole)
+        if field is None:
+            return
+        card = QRectF(option.rect).adjusted(self.margin, self.margin, -self.margin, -self.margin)
+        painter.save()
+        painter.setRenderHint(painter.Antialiasing)
+        painter.setPen(self.card_pen)
+        painter.setBrush(self.card_brush)
+        painter.drawRoundedRect(card, 10, 10)
+
+        inner = card.adjusted(10, 10, -10, -10)
+        painter.setFont(self.label_font)
+        painter.setPen(self.label_pen)
+        label = self._label(field, inner.width())
+        painter.drawStaticText(QPointF(inner.left(), inner.top()), label)
+
+        value_top = inner.top() + label.size().height() + 5
+        painter.setFont(self.value_font)
+        painter.setPen(self.value_pen)
+        painter.drawText(QRectF(inner.left(), value_top, inner.width(), inner.bottom() - value_top),
+                         Qt.AlignHCenter | Qt.AlignTop | Qt.TextWordWrap, index.data(Qt.DisplayRole))
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        return QSize(180 + 2 * self.margin, 90 + 2 * self.margin)
+
+
+class TelemetryGridView(QTableView):
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.setItemDelegate(TelemetryCardDelegate(self))
+        self.setShowGrid(False)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setFocusPolicy(Qt.NoFocus)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.horizontalHeader().hide()
+        self.verticalHeader().hide()
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.horizontalHeader().setMinimumSectionSize(180)
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().setDefaultSectionSize(110)
+        self.setStyleSheet("QTableView { background-color: white; border: none; }")
@@ -0,0 +1,179 @@
+# tiles.py
+"""
+Offline map tiles.
+
+TileCache is an MBTiles file (SQLite, TMS row order) that the map page
+reads through the tiles: URL scheme (see map2.py). Fill it before a
+launch with the prefetch tool:
+
+    python tiles.py --bbox 23.0 72.4 23.3 72.8 --zoom 10 17
+
+which downloads every tile in the box for the zoom range, skipping
+tiles already cached. Tiles missed at runtime are fetched and cached
+too if the map's tile handler is put online (off by default).
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+TILE_URL = "https://tile.openstreetmap.org/{z}/{x}/{y}.png"
+DEFAULT_CACHE = os.path.join(os.path.expanduser("~"), "navigator_tiles", "osm.mbtiles")
+USER_AGENT = "NAVIGATOR-ground-station/1.0 (tile prefetch)"
+
+
+class TileCache:
+    """Tiles by XYZ address, stored in MBTiles layout. Safe to share between threads."""
+
+    def __init__(self, path=DEFAULT_CACHE):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER,"
+            " tile_data BLOB, PRIMARY KEY (zoom_level, tile_column, tile_row))"
+        )
+        self._db.executemany(
+            "INSERT OR IGNORE INTO metadata VALUES (?, ?)",
+            [("name", "navigator"), ("format", "png"), ("type", "baselayer"), ("version", "1")],
+        )
+        self._db.commit()
+
+    @staticmethod
+    def _row(z, y):
+        return (1 << z) - 1 - y  # MBTiles rows count from the south
+
+    def get(self, z, x, y):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                (z, x, self._row(z, y)),
+            ).fetchone()
+        return row[0] if row else None
+
+    def __contains__(self, zxy):
+        z, x, y = zxy
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                (z, x, self._row(z, y)),
+            ).fetchone() is not None
+
+    def put(self, z, x, y, data):
+        self.put_many([(z, x, y, data)])
+
+    def put_many(self, tiles):
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)",
+                [(z, x, self._row(z, y), sqlite3.Binary(data)) for z, x, y, data in tiles],
+            )
+            self._db.commit()
+
+    def set_metadata(self, **values):
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO metadata VALUES (?, ?)", [(k, str(v)) for k, v in values.items()])
+            self._db.commit()
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def tile_xy(lat, lon, z):
+    """Web Mercator tile containing (lat, lon) at zoom z."""
+    n = 1 << z
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_in_bbox(south, west, north, east, min_zoom, max_zoom):
+    """Every (z, x, y) covering the box, coarse zoom levels first."""
+    for z in range(min_zoom, max_zoom + 1):
+        x0, y0 = tile_xy(north, west, z)
+        x1, y1 = tile_xy(south, east, z)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield z, x, y
+
+
+def fetch_tile(z, x, y, url=TILE_URL, timeout=10):
+    request = urllib.request.Request(url.format(z=z, x=x, y=y), headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read()
+
+
+def prefetch(cache, south, west, north, east, min_zoom, max_zoom, url=TILE_URL, workers=2, delay=0.05,
+             progress=None):
+    """
+    Download the box's missing tiles into cache. Returns (fetched, skipped, failed).
+    Keep workers low and delay non-zero for public tile servers.
+    """
+    wanted = list(tiles_in_bbox(south, west, north, east, min_zoom, max_zoom))
+    todo = [t for t in wanted if t not in cache]
+    total = len(todo)
+    fetched = failed = 0
+
+    def fetch(tile):
+        time.sleep(delay)
+        try:
+            return tile, fetch_tile(*tile, url=url)
+        except OSError as e:
+            print(f"[TileCache] {tile} fetch error: {e}")
+            return tile, None
+
+    batch = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for done, (tile, data) in enumerate(pool.map(fetch, todo), 1):
+            if data is None:
+                failed += 1
+            else:
+                batch.append((*tile, data))
+                fetched += 1
+            if len(batch) >= 64 or (batch and done == total):
+                cache.put_many(batch)
+                batch = []
+            if progress:
+                progress(done, total)
+
+    cache.set_metadata(bounds=f"{west},{south},{east},{north}", minzoom=min_zoom, maxzoom=max_zoom)
+    return fetched, len(wanted) - total, failed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Prefetch map tiles for offline use")
+    parser.add_argument("--bbox", nargs=4, type=float, required=True, metavar=("SOUTH", "WEST", "NORTH", "EAST"))
+    parser.add_argument("--zoom", nargs=2, type=int, default=(10, 16), metavar=("MIN", "MAX"))
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="MBTiles file to fill")
+    parser.add_argument("--url", default=TILE_URL, help="tile URL template with {z} {x} {y}")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    south, west, north, east = args.bbox
+    cache = TileCache(args.cache)
+    total = sum(1 for _ in tiles_in_bbox(south, west, north, east, *args.zoom))
+    print(f"🗺️ {total} tiles in box, {cache.count()} already in {args.cache}")
+
+    def report(done, todo):
+        if done % 100 == 0 or done == todo:
+            print(f"  {done}/{todo}")
+
+    fetched, _, failed = prefetch(cache, south, west, north, east, *args.zoom, url=args.url,
+                                  workers=args.workers, progress=report)
+    print(f"✅ Fetched {fetched} tiles, {failed} failed, {cache.count()} cached")
+    cache.close()
@@ -0,0 +1,92 @@
+# track.py
+import math
+
+import numpy as np
+
+
+METERS_PER_DEG_LAT = 110540.0
+METERS_PER_DEG_LON = 111320.0  # at the equator
+
+
+class TrackSimplifier:
+    """
+    Streaming polyline simplification (sliding-window Douglas-Peucker).
+
+    Fixes after the last kept vertex (the anchor) are buffered. While every
+    buffered fix lies within `tolerance` metres of the straight line from
+    the anchor to the newest fix, nothing is kept; when one strays, the
+    fix before the newest becomes a vertex and the new anchor. Vertices are
+    only ever appended, so a consumer can send just the new ones.
+    """
+
+    def __init__(self, tolerance, max_buffer=1000):
+        self.tolerance = tolerance
+        self.max_buffer = max_buffer
+        self.vertices = []   # kept [lat, lon], append-only
+        self._lat = []
+        self._lon = []
+        self.latest = None
+
+    def add(self, lat, lon):
+        self.latest = [lat, lon]
+        if not self.vertices:
+            self.vertices.append([lat, lon])
+            return
+        self._lat.append(lat)
+        self._lon.append(lon)
+        if len(self._lat) < 2:
+            return
+        if len(self._lat) > self.max_buffer or self._strays():
+            # Keep the fix before the newest; the newest starts the next buffer
+            self.vertices.append([self._lat[-2], self._lon[-2]])
+            self._lat = self._lat[-1:]
+            self._lon = self._lon[-1:]
+
+    def _strays(self):
+        lat0, lon0 = self.vertices[-1]
+        scale = METERS_PER_DEG_LON * math.cos(math.radians(lat0))
+        x = (np.asarray(self._lon) - lon0) * scale
+        y = (np.asarray(self._lat) - lat0) * METERS_PER_DEG_LAT
+        ex, ey = x[-1], y[-1]
+        length = math.hypot(ex, ey)
+        if length < 1e-9:
+            distance = np.hypot(x[:-1], y[:-1])
+        else:
+            distance = np.abs(x[:-1] * ey - y[:-1] * ex) / length
+        return bool((distance > self.tolerance).any())
+
+
+class SimplifiedTrack:
+    """
+    One TrackSimplifier per tolerance level (x4 apart), so the map can switch
+    level with its zoom: level_for_zoom() picks the coarsest one whose
+    error stays under about `pixels` screen pixels. The finest level sits
+    at GNSS noise (3 m); going lower only draws the jitter.
+    """
+
+    def __init__(self, tolerances=(3.0, 12.0, 48.0, 192.0, 768.0), pixels=1.5):
+        self.levels = [TrackSimplifier(t) for t in tolerances]
+        self.pixels = pixels
+        self.fixes = 0
+
+    def add(self, lat, lon):
+        self.fixes += 1
+        for level in self.levels:
+            level.add(lat, lon)
+
+    def add_many(self, fixes):
+        for lat, lon in fixes:
+            self.add(lat, lon)
+
+    def level_for_zoom(self, zoom, lat):
+        """Index of the level to draw at a Web Mercator zoom level."""
+        meters_per_pixel = 156543.03 * math.cos(math.radians(lat)) / (2 ** zoom)
+        allowed = meters_per_pixel * self.pixels
+        best = 0
+        for i, level in enumerate(self.levels):
+            if level.tolerance <= allowed:
+                best = i
+        return best
+
+    def clear(self):
+        self.__init__(tuple(level.tolerance for level in self.levels), self.pixels)
@@ -1,11 +1,146 @@
 # trajectory3d.py
 from PyQt5.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QLabel, QFrame, QSizePolicy
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QColor, QVector3D, QQuaternion
 from PyQt5.Qt3DCore import QEntity, QTransform
-from PyQt5.Qt3DExtras import QPhongMaterial, QCuboidMesh, QOrbitCameraController, Qt3DWindow
-from PyQt5.Qt3DRender import QDirectionalLight
-import re
+from PyQt5.Qt3DExtras import (
+    QPhongMaterial, QCuboidMesh, QOrbitCameraController, QPerVertexColorMaterial, Qt3DWindow
+)
+from PyQt5.Qt3DRender import QAttribute, QBuffer, QDirectionalLight, QGeometry, QGeometryRenderer
+import math
+
+import numpy as np
+
+from ingest import KEEP_ALL
+from render import get_render_scheduler
+from track import METERS_PER_DEG_LAT, METERS_PER_DEG_LON
+
+
+ATTITUDE_CHANNELS = ("Attitude W", "Attitude X", "Attitude Y", "Attitude Z")
+METERS_PER_UNIT = 10.0  # scene scale: one grid square is 10 m
+GRID_COLOR = (180 / 255, 180 / 255, 180 / 255)
+TRAIL_COLOR = (1.0, 0.6, 0.1)
+
+
+class LineBuffer(QEntity):
+    """
+    Lines drawn in one draw call from a single vertex QBuffer.
+
+    Vertices (x, y, z, r, g, b as float32) live in a preallocated array.
+    append() uploads only the new slice with QBuffer.updateData(); when the
+    array is full its capacity doubles and the buffer is uploaded once.
+    """
+
+    STRIDE = 6 * 4  # bytes per vertex
+
+    def __init__(self, parent, primitive=QGeometryRenderer.Lines, capacity=1024):
+        super().__init__(parent)
+        self.count = 0
+        self._vertices = np.zeros((capacity, 6), dtype=np.float32)
+
+        self.buffer = QBuffer(self)
+        self.buffer.setData(self._vertices.tobytes())
+        geometry = QGeometry(self)
+        self._attributes = [
+            self._attribute(geometry, QAttribute.defaultPositionAttributeName(), 0),
+            self._attribute(geometry, QAttribute.defaultColorAttributeName(), 3 * 4),
+        ]
+
+        self.renderer = QGeometryRenderer(self)
+        self.renderer.setPrimitiveType(primitive)
+        self.renderer.setGeometry(geometry)
+        self.renderer.setVertexCount(0)
+        self.addComponent(self.renderer)
+        self.addComponent(QPerVertexColorMaterial(self))
+
+    def _attribute(self, geometry, name, offset):
+        attribute = QAttribute(geometry)
+        attribute.setName(name)
+        attribute.setAttributeType(QAttribute.VertexAttribute)
+        attribute.setVertexBaseType(QAttribute.Float)
+        attribute.setVertexSize(3)
+        attribute.setByteOffset(offset)
+        attribute.setByteStride(self.STRIDE)
+        attribute.setBuffer(self.buffer)
+        attribute.setCount(0)
+        geometry.addAttribute(attribute)
+        return attribute
+
+    @property
+    def capacity(self):
+        return len(self._vertices)
+
+    def append(self, points, color):
+        """Append an (n, 3) array of vertices, all drawn in one RGB color (0..1)."""
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        n = len(points)
+        if n == 0:
+            return
+        start, end = self.count, self.count + n
+        grow = end > self.capacity
+        if grow:
+            grown = np.zeros((max(2 * self.capacity, end), 6), dtype=np.float32)
+            grown[:start] = self._vertices[:start]
+            self._vertices = grown
+        self._vertices[start:end, :3] = points
+        self._vertices[start:end, 3:] = color
+        if grow:
+            self.buffer.setData(self._vertices.tobytes())
+        else:
+            self.buffer.updateData(start * self.STRIDE, self._vertices[start:end].tobytes())
+        self._set_count(end)
+
+    def clear(self):
+        self._set_count(0)
+
+    def _set_count(self, count):
+        self.count = count
+        for attribute in self._attributes:
+            attribute.setCount(count)
+        self.renderer.setVertexCount(count)
+
+
+class PoseState:
+    """
+    Pose for the 3D view, written by the ingest callback and applied once
+    per rendered frame. Only the newest position and rotation are kept;
+    positions in between are queued as trail points so the path stays
+    complete.
+    """
+
+    def __init__(self):
+        self.position = None  # (x, y, z) scene units
+        self.rotation = None  # (roll, pitch, yaw) degrees
+        self.orientation = None  # (w, x, y, z) quaternion, world z up
+        self.trail = []
+        self.pending = 0
+        self.updates = 0
+        self.frames = 0
+
+    def update(self, position=None, rotation=None, orientation=None):
+        if position is not None:
+            if position != self.position:
+                self.trail.append(position)
+            self.position = position
+        if rotation is not None:
+            self.rotation = rotation
+        if orientation is not None:
+            self.orientation = orientation
+        self.pending += 1
+        self.updates += 1
+
+    def take(self):
+        """Trail points since the last frame; marks the pending updates applied."""
+        trail, self.trail = self.trail, []
+        if self.pending:
+            self.frames += 1
+            self.pending = 0
+        return trail
+
+    @property
+    def coalesced(self):
+        """Updates folded into a later one instead of being applied."""
+        return self.updates - self.frames
 
 
 class InfoPanel(QFrame):
@@ -23,10 +158,13 @@ class InfoPanel(QFrame):
 
         self.coord_label = QLabel("Coordinates:\nX: 0.00\nY: 0.00\nZ: 0.00")
         self.rpy_label = QLabel("Orientation:\nRoll: 0°\nPitch: 0°\nYaw: 0°")
+        self.stats_label = QLabel("Updates: 0\nCoalesced: 0")
 
         layout.addWidget(self.coord_label)
         layout.addSpacing(10)
         layout.addWidget(self.rpy_label)
+        layout.addSpacing(10)
+        layout.addWidget(self.stats_label)
         layout.addStretch()
 
     def update_info(self, pos: QVector3D, rotation: QVector3D):
@@ -37,6 +175,9 @@ class InfoPanel(QFrame):
             f"Orientation:\nRoll: {rotation.x():.0f}°\nPitch: {rotation.y():.0f}°\nYaw: {rotation.z():.0f}°"
         )
 
+    def update_stats(self, updates, coalesced):
+        self.stats_label.setText(f"Updates: {updates}\nCoalesced: {coalesced}")
+
 
 class TrajectoryWidget(QWidget):
     """3D Trajectory Viewer embedded safely in QWidget"""
@@ -46,6 +187,8 @@ class TrajectoryWidget(QWidget):
 
         self.current_position = QVector3D(0, 1, 0)
         self.current_rotation = QVector3D(0, 0, 0)
+        self.state = PoseState()
+        self.origin = None  # (lat, lon) of the first fix, the scene origin
 
         self.main_layout = QHBoxLayout()
         self.setLayout(self.main_layout)
@@ -68,11 +211,12 @@ class TrajectoryWidget(QWidget):
         # Setup scene
         self._setup_camera()
         self._setup_grid()
+        self._setup_trail()
         self._load_cube()
 
-        # Serial updates scheduled safely
-        
-        self.serial_manager.data_received.connect(self.schedule_update)
+        # Packets only update self.state; the frame scheduler applies it while visible
+        self.render_target = get_render_scheduler().register(self, self.apply_state)
+        self.serial_manager.subscribe(self.on_serial_data, policy=KEEP_ALL, name="trajectory")
 
     def _load_cube(self):
         """Load a cube representing the object"""
@@ -118,61 +262,66 @@ class TrajectoryWidget(QWidget):
         cam_controller.setCamera(camera)
 
     def _setup_grid(self):
-        for axis in range(-10, 11):
-            if axis == 0:
-                continue
-
-            # X lines
-            line_x = QEntity(self.root_entity)
-            mesh_x = QCuboidMesh()
-            mesh_x.setXExtent(0.02)
-            mesh_x.setYExtent(0.02)
-            mesh_x.setZExtent(20.0)
-            transform_x = QTransform()
-            transform_x.setTranslation(QVector3D(axis, 0, 0))
-            mat_x = QPhongMaterial()
-            mat_x.setDiffuse(QColor(180, 180, 180))
-            line_x.addComponent(mesh_x)
-            line_x.addComponent(mat_x)
-            line_x.addComponent(transform_x)
-
-            # Z lines
-            line_z = QEntity(self.root_entity)
-            mesh_z = QCuboidMesh()
-            mesh_z.setXExtent(20.0)
-            mesh_z.setYExtent(0.02)
-            mesh_z.setZExtent(0.02)
-            transform_z = QTransform()
-            transform_z.setTranslation(QVector3D(0, 0, axis))
-            mat_z = QPhongMaterial()
-            mat_z.setDiffuse(QColor(180, 180, 180))
-            line_z.addComponent(mesh_z)
-            line_z.addComponent(mat_z)
-            line_z.addComponent(transform_z)
-
-    def schedule_update(self, data: str):
-        """Schedule the update safely to avoid blocking the main UI thread"""
-        QTimer.singleShot(0, lambda: self.on_serial_data(data))
-
-    def on_serial_data(self, data: str):
-        """Update position and rotation from serial data"""
+        """Floor grid: every line in one line-list geometry, one draw call."""
+        ticks = np.arange(-10, 11, dtype=np.float32)
+        ticks = ticks[ticks != 0]
+        zeros = np.zeros_like(ticks)
+        ends = np.full_like(ticks, 10.0)
+        x_lines = np.stack([np.column_stack((ticks, zeros, -ends)), np.column_stack((ticks, zeros, ends))], axis=1)
+        z_lines = np.stack([np.column_stack((-ends, zeros, ticks)), np.column_stack((ends, zeros, ticks))], axis=1)
+        self.grid = LineBuffer(self.root_entity, QGeometryRenderer.Lines, capacity=4 * len(ticks))
+        self.grid.append(np.concatenate((x_lines, z_lines)).reshape(-1, 3), GRID_COLOR)
+
+    def _setup_trail(self):
+        """Path flown so far, one line strip that grows as positions arrive."""
+        self.trail = LineBuffer(self.root_entity, QGeometryRenderer.LineStrip, capacity=4096)
+
+    def local_position(self, packet):
+        """Scene position of a packet's fix: east, altitude, south from the first fix."""
+        lat = packet["GNSS Latitude"]
+        lon = packet["GNSS Longitude"]
+        altitude = packet["Altitude"]
+        if lat is None or lon is None or altitude is None:
+            return None
+        if self.origin is None:
+            self.origin = (lat, lon)
+        lat0, lon0 = self.origin
+        east = (lon - lon0) * METERS_PER_DEG_LON * math.cos(math.radians(lat0))
+        north = (lat - lat0) * METERS_PER_DEG_LAT
+        return (east / METERS_PER_UNIT, altitude / METERS_PER_UNIT, -north / METERS_PER_UNIT)
+
+    def on_serial_data(self, packets):
+        """Fold a batch into the pose state; nothing is drawn until the next frame."""
         try:
-            parts = re.split(r'[,:]', data)
-            kv = dict(zip(parts[::2], parts[1::2]))
-
-            x = float(kv.get("X", self.current_position.x()))
-            y = float(kv.get("Y", self.current_position.y()))
-            z = float(kv.get("Z", self.current_position.z()))
-            roll = float(kv.get("ROLL", self.current_rotation.x()))
-            pitch = float(kv.get("PITCH", self.current_rotation.y()))
-            yaw = float(kv.get("YAW", self.current_rotation.z()))
-        except (ValueError, IndexError):
-            return  
-
-        self.current_position = QVector3D(x, y, z)
-        self.current_rotation = QVector3D(roll, pitch, yaw)
-
-        self.transform.setTranslation(self.current_position)
-        self.transform.setRotation(QQuaternion.fromEulerAngles(roll, pitch, yaw))
+            for packet in packets:
+                roll, pitch, yaw = packet.get("Roll"), packet.get("Pitch"), packet.get("Yaw")
+                rotation = None if None in (roll, pitch, yaw) else (roll, pitch, yaw)
+                orientation = tuple(packet.get(name) for name in ATTITUDE_CHANNELS)
+                if None in orientation:
+                    orientation = None
+                self.state.update(self.local_position(packet), rotation, orientation)
+            self.render_target.mark_dirty()
+        except Exception as e:
+            print(f"[TrajectoryWidget] Error reading packet: {e}")
+
+    def apply_state(self):
+        """Apply the latest pose and the new trail points, once per frame."""
+        trail = self.state.take()
+        if trail:
+            self.trail.append(trail, TRAIL_COLOR)
+        if self.state.position is not None:
+            self.current_position = QVector3D(*self.state.position)
+            self.transform.setTranslation(self.current_position)
+        if self.state.rotation is not None:
+            roll, pitch, yaw = self.state.rotation
+            self.current_rotation = QVector3D(roll, pitch, yaw)
+        if self.state.orientation is not None:
+            # Attitude quaternion (derived.py) is z-up; the scene is y-up with north at -z
+            w, x, y, z = self.state.orientation
+            self.transform.setRotation(QQuaternion(w, x, z, -y))
+        elif self.state.rotation is not None:
+            roll, pitch, yaw = self.state.rotation
+            self.transform.setRotation(QQuaternion.fromEulerAngles(pitch, yaw, roll))
 
         self.info_panel.update_info(self.current_position, self.current_rotation)
+        self.info_panel.update_stats(self.state.updates, self.state.coalesced)